@@ -1,21 +1,44 @@
 # app.py
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
 import json
 import time
 import logging
+import logging.handlers
+import atexit
+import shutil
+import sqlite3
+import hashlib
+import base64
+import gzip
+import bisect
+import io
+import threading
+import uuid
+import re
+import contextvars
+import random
+import ipaddress
+import fnmatch
 from datetime import datetime
 import os
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Empty, Full, PriorityQueue, Queue
+from itertools import islice
 from typing import Dict, List, Optional, Tuple
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('cisco_app.log'),
-        logging.StreamHandler()
-    ]
-)
+# Span of the trace being recorded in the current context (see trace_span)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+class TraceIdFilter(logging.Filter):
+    """Stamp every log record with the current trace ID (``-`` outside a trace)"""
+
+    def filter(self, record):
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span else '-'
+        return True
+
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
@@ -49,105 +72,1310 @@ def test():
 class Config:
     """Application configuration"""
     def __init__(self):
-        self.mock_mode = os.getenv('MOCK_MODE', 'true').lower() == 'true'
-        self.switch_ip = os.getenv('SWITCH_IP', '192.168.1.1')
+        self.state_backend = os.getenv('STATE_BACKEND', 'memory').lower()
+        self.state_db = os.getenv('STATE_DB', 'state.db')
+        self.state_secret = os.getenv('STATE_SECRET', '')
+        self._mock_mode = os.getenv('MOCK_MODE', 'true').lower() == 'true'
+        self._switch_ip = os.getenv('SWITCH_IP', '192.168.1.1')
         self.switch_username = os.getenv('SWITCH_USERNAME', 'admin')
         self.switch_password = os.getenv('SWITCH_PASSWORD', 'admin')
         self.ssh_port = int(os.getenv('SSH_PORT', '22'))
         self.connection_timeout = int(os.getenv('CONNECTION_TIMEOUT', '30'))
+        self.pool_max_size = int(os.getenv('POOL_MAX_SIZE', '32'))
+        self.pool_idle_ttl = int(os.getenv('POOL_IDLE_TTL', '300'))
+        self.ssh_keepalive = int(os.getenv('SSH_KEEPALIVE', '30'))
+        self.device_worker_idle = int(os.getenv('DEVICE_WORKER_IDLE', '60'))
+        self.breaker_failure_threshold = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '3'))
+        self.breaker_base_delay = float(os.getenv('BREAKER_BASE_DELAY', '5'))
+        self.breaker_max_delay = float(os.getenv('BREAKER_MAX_DELAY', '300'))
+        self.rate_limits = os.getenv('RATE_LIMITS', 'WS-C2960*=5,10,2;*=10,20,4')
+        self.fleet_max_workers = int(os.getenv('FLEET_MAX_WORKERS', '32'))
+        self.fleet_per_device_limit = int(os.getenv('FLEET_PER_DEVICE_LIMIT', '1'))
+        self.fleet_job_history = int(os.getenv('FLEET_JOB_HISTORY', '50'))
+        self.job_max_workers = int(os.getenv('JOB_MAX_WORKERS', '16'))
+        self.job_history = int(os.getenv('JOB_HISTORY', '200'))
+        self.job_max_wait = int(os.getenv('JOB_MAX_WAIT', '30'))
+        self.interface_cache_ttl = int(os.getenv('INTERFACE_CACHE_TTL', '300'))
+        self.status_cache_ttl = int(os.getenv('STATUS_CACHE_TTL', '60'))
+        self.log_capacity = int(os.getenv('LOG_CAPACITY', '1000'))
+        self.event_capacity = int(os.getenv('EVENT_CAPACITY', '1000'))
+        self.event_heartbeat = int(os.getenv('EVENT_HEARTBEAT', '15'))
+        self.event_stream_max_age = int(os.getenv('EVENT_STREAM_MAX_AGE', '300'))
+        self.event_log_poll = float(os.getenv('EVENT_LOG_POLL', '1'))
+        self.session_record_dir = os.getenv('SESSION_RECORD_DIR', '')
+        self.session_replay_dir = os.getenv('SESSION_REPLAY_DIR', '')
+        self.session_replay_speed = float(os.getenv('SESSION_REPLAY_SPEED', '1'))
+        self.log_file = os.getenv('LOG_FILE', 'cisco_app.log')
+        self.log_max_bytes = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+        self.log_rotate_interval = int(os.getenv('LOG_ROTATE_INTERVAL', '86400'))
+        self.log_backup_count = int(os.getenv('LOG_BACKUP_COUNT', '7'))
+        self.log_queue_size = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+        self.audit_db = os.getenv('AUDIT_DB', 'audit.db')
+        self.audit_batch_size = int(os.getenv('AUDIT_BATCH_SIZE', '200'))
+        self.audit_flush_interval = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1'))
+        self.trace_capacity = int(os.getenv('TRACE_CAPACITY', '500'))
+        self.trace_max_spans = int(os.getenv('TRACE_MAX_SPANS', '500'))
+        self.mock_fleet_size = int(os.getenv('MOCK_FLEET_SIZE', '0'))
+        self.mock_members = int(os.getenv('MOCK_MEMBERS', '1'))
+        self.mock_ports = int(os.getenv('MOCK_PORTS', '24'))
+        self.mock_seed = int(os.getenv('MOCK_SEED', '0'))
+        self.mock_secured_ratio = float(os.getenv('MOCK_SECURED_RATIO', '0.5'))
+        self.mock_latency = os.getenv('MOCK_LATENCY', 'none')
+        self.mock_latency_blocking = os.getenv('MOCK_LATENCY_BLOCKING', 'false').lower() == 'true'
+
+    # Settings changed at runtime through /api/config live in the state store so every worker sees them
+    @property
+    def mock_mode(self) -> bool:
+        return state_store.get('settings', 'mock_mode', self._mock_mode)
+    
+    @mock_mode.setter
+    def mock_mode(self, value: bool):
+        state_store.set('settings', 'mock_mode', bool(value))
+    
+    @property
+    def switch_ip(self) -> str:
+        return state_store.get('settings', 'switch_ip', self._switch_ip)
+    
+    @switch_ip.setter
+    def switch_ip(self, value: str):
+        state_store.set('settings', 'switch_ip', value)
 
 config = Config()
 
-class MockCiscoSwitch:
-    """Mock Cisco switch for testing purposes"""
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Log file rotated by size or age, with rotated segments gzip-compressed
+
+    Segments are named ``<file>.1.gz`` (newest) to ``<file>.<backupCount>.gz``.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, interval: float, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+        self.namer = lambda name: name + '.gz'
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        with open(source, 'rb') as plain, gzip.open(dest, 'wb') as compressed:
+            shutil.copyfileobj(plain, compressed)
+        os.remove(source)
+
+    def shouldRollover(self, record) -> bool:
+        if self.interval > 0 and time.time() >= self.rollover_at:
+            self.rollover_at = time.time() + self.interval
+            if self.stream is None or self.stream.tell() > 0:
+                return True
+        return bool(super().shouldRollover(record))
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the logging thread
+
+    Past ``sample_above`` (a fraction of the queue's capacity) only one in
+    ``sample_every`` records below WARNING is kept; when the queue is full
+    records are dropped. The number of dropped records is logged once the
+    queue has room again.
+    """
+
+    def __init__(self, log_queue: Queue, sample_above: float = 0.8, sample_every: int = 10):
+        super().__init__(log_queue)
+        self.high_water = int(log_queue.maxsize * sample_above) if log_queue.maxsize > 0 else 0
+        self.sample_every = sample_every
+        self.dropped = 0
+        self._unreported = 0
+        self._sampled = 0
+
+    def enqueue(self, record):
+        if self.high_water and self.queue.qsize() >= self.high_water and record.levelno < logging.WARNING:
+            self._sampled += 1
+            if self._sampled % self.sample_every:
+                self._drop()
+                return
+        try:
+            if self._unreported:
+                dropped, self._unreported = self._unreported, 0
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING', 'trace_id': '-',
+                    'msg': f"Dropped {dropped} log records under backpressure"}))
+            self.queue.put_nowait(record)
+        except Full:
+            self._drop()
+
+    def _drop(self):
+        self.dropped += 1
+        self._unreported += 1
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """Route all logging through a bounded queue drained by a background listener
+
+    Request threads only enqueue records; the listener thread does the file
+    and console writes.
+    """
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(trace_id)s] %(message)s')
+    handlers = [
+        CompressingRotatingFileHandler(config.log_file.format(pid=os.getpid()), config.log_max_bytes, config.log_rotate_interval,
+                                       config.log_backup_count),
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = DroppingQueueHandler(Queue(maxsize=config.log_queue_size))
+    queue_handler.addFilter(TraceIdFilter())
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+log_listener = configure_logging()
+
+class MemoryStateStore:
+    """Process-local state store (the default)
+
+    Namespaced key/value pairs kept in dicts; every worker process has its
+    own copy, so run a single process with this backend.
+    """
+    
+    shared = False
     
     def __init__(self):
-        self.interfaces = {
-            'GigabitEthernet0/1': {
-                'port_security': True,
-                'max_mac_addresses': 2,
-                'violation_action': 'shutdown',
-                'learned_mac_addresses': ['00:11:22:33:44:55'],
-                'status': 'up'
-            },
-            'GigabitEthernet0/2': {
-                'port_security': False,
-                'max_mac_addresses': 1,
-                'violation_action': 'restrict',
-                'learned_mac_addresses': [],
-                'status': 'down'
-            },
-            'GigabitEthernet0/3': {
-                'port_security': True,
-                'max_mac_addresses': 3,
-                'violation_action': 'protect',
-                'learned_mac_addresses': ['00:AA:BB:CC:DD:EE', '00:FF:FF:FF:FF:FF'],
-                'status': 'up'
-            },
-            'GigabitEthernet0/4': {
-                'port_security': False,
-                'max_mac_addresses': 1,
-                'violation_action': 'shutdown',
-                'learned_mac_addresses': [],
-                'status': 'up'
-            },
-            'GigabitEthernet0/5': {
-                'port_security': True,
-                'max_mac_addresses': 1,
-                'violation_action': 'restrict',
-                'learned_mac_addresses': ['00:12:34:56:78:90'],
-                'status': 'up'
-            }
+        self._data: Dict[str, 'OrderedDict[str, object]'] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, namespace: str, key: str, default=None):
+        with self._lock:
+            return self._data.get(namespace, {}).get(key, default)
+    
+    def set(self, namespace: str, key: str, value):
+        self.set_many(namespace, {key: value})
+    
+    def set_many(self, namespace: str, values: Dict[str, object]):
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            for key, value in values.items():
+                entries.pop(key, None)
+                entries[key] = value
+    
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.get(namespace, {}).pop(key, None)
+    
+    def items(self, namespace: str) -> Dict[str, object]:
+        """Every pair in a namespace, least recently set first"""
+        with self._lock:
+            return dict(self._data.get(namespace, {}))
+    
+    def clear(self, namespace: str):
+        with self._lock:
+            self._data.pop(namespace, None)
+    
+    def prune(self, namespace: str, keep: int):
+        """Drop all but the ``keep`` most recently set pairs"""
+        with self._lock:
+            entries = self._data.get(namespace, {})
+            for key in list(entries)[:max(0, len(entries) - keep)]:
+                del entries[key]
+    
+    def cache(self, ttl: float, name: str) -> 'TTLCache':
+        return TTLCache(ttl, name)
+    
+    def log_buffer(self, capacity: int) -> 'LogBuffer':
+        return LogBuffer(capacity)
+    
+    def seal(self, secret: str) -> str:
+        """Values never leave the process, so secrets are kept as they are"""
+        return secret
+    
+    def unseal(self, sealed: str) -> str:
+        return sealed
+
+class SQLiteStateStore:
+    """State store shared by every worker process through one SQLite database
+
+    Values are stored as JSON in WAL mode, so readers in one process never
+    wait for a writer in another. Each thread of each process uses its own
+    connection. The database persists across restarts, so it is created
+    readable by its owner only (SQLite gives its -wal and -shm files the
+    same mode), and switch passwords are stored encrypted with ``seal``.
+    """
+    
+    shared = True
+    
+    def __init__(self, path: str, secret: str = ''):
+        self.path = path
+        self._local = threading.local()
+        # Create the file (and fix up files left by older versions) before SQLite opens any of them
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        for name in (path, f"{path}-wal", f"{path}-shm"):
+            if os.path.exists(name):
+                os.chmod(name, 0o600)
+        self._fernet = self._load_fernet(secret)
+        connection = self._db()
+        with connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS kv (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )""")
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_kv_updated ON kv (namespace, updated)')
+            connection.execute('CREATE TABLE IF NOT EXISTS logs (seq INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT NOT NULL)')
+    
+    def _load_fernet(self, secret: str):
+        """Key for sealing secrets: derived from STATE_SECRET, else kept in an owner-only key file
+
+        The key file sits next to the database and is created once, so every
+        worker process (and the next restart) uses the same key.
+        """
+        from cryptography.fernet import Fernet
+        
+        if secret:
+            return Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret.encode('utf-8')).digest()))
+        key_path = f"{self.path}.key"
+        try:
+            descriptor = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # Another worker may be writing it right now
+            for _ in range(50):
+                with open(key_path, 'rb') as handle:
+                    key = handle.read().strip()
+                if key:
+                    return Fernet(key)
+                time.sleep(0.1)
+            raise RuntimeError(f"State key file {key_path} is empty")
+        key = Fernet.generate_key()
+        with os.fdopen(descriptor, 'wb') as handle:
+            handle.write(key)
+        return Fernet(key)
+    
+    def seal(self, secret: str) -> str:
+        """Encrypt a secret before it is stored"""
+        return self._fernet.encrypt(secret.encode('utf-8')).decode('ascii')
+    
+    def unseal(self, sealed: str) -> str:
+        """Decrypt a sealed secret; values stored before sealing existed are returned as they are"""
+        from cryptography.fernet import InvalidToken
+        
+        try:
+            return self._fernet.decrypt(sealed.encode('ascii')).decode('utf-8')
+        except (InvalidToken, UnicodeEncodeError):
+            return sealed
+    
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so they are keyed by process as well as thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+    
+    def get(self, namespace: str, key: str, default=None):
+        row = self._db().execute('SELECT value FROM kv WHERE namespace = ? AND key = ?', (namespace, key)).fetchone()
+        return json.loads(row[0]) if row else default
+    
+    def set(self, namespace: str, key: str, value):
+        self.set_many(namespace, {key: value})
+    
+    def set_many(self, namespace: str, values: Dict[str, object]):
+        now = time.time()
+        with self._db() as connection:
+            connection.executemany('INSERT OR REPLACE INTO kv (namespace, key, value, updated) VALUES (?, ?, ?, ?)',
+                                   [(namespace, key, json.dumps(value), now) for key, value in values.items()])
+    
+    def delete(self, namespace: str, key: str):
+        with self._db() as connection:
+            connection.execute('DELETE FROM kv WHERE namespace = ? AND key = ?', (namespace, key))
+    
+    def delete_prefix(self, namespace: str, prefix: str):
+        """Delete every key starting with ``prefix`` as one range scan of the primary key"""
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._db() as connection:
+            connection.execute('DELETE FROM kv WHERE namespace = ? AND key >= ? AND key < ?',
+                               (namespace, prefix, upper))
+    
+    def items(self, namespace: str) -> Dict[str, object]:
+        """Every pair in a namespace, least recently set first"""
+        rows = self._db().execute('SELECT key, value FROM kv WHERE namespace = ? ORDER BY updated, rowid',
+                                  (namespace,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+    
+    def clear(self, namespace: str):
+        with self._db() as connection:
+            connection.execute('DELETE FROM kv WHERE namespace = ?', (namespace,))
+    
+    def prune(self, namespace: str, keep: int):
+        """Drop all but the ``keep`` most recently set pairs"""
+        with self._db() as connection:
+            connection.execute('DELETE FROM kv WHERE namespace = ? AND key NOT IN (SELECT key FROM kv WHERE '
+                               'namespace = ? ORDER BY updated DESC LIMIT ?)', (namespace, namespace, keep))
+    
+    def cache(self, ttl: float, name: str) -> 'SharedTTLCache':
+        return SharedTTLCache(self, ttl, name)
+    
+    def log_buffer(self, capacity: int) -> 'SharedLogBuffer':
+        return SharedLogBuffer(self, capacity)
+
+def create_state_store():
+    """Build the state store selected by STATE_BACKEND"""
+    if config.state_backend == 'sqlite':
+        return SQLiteStateStore(config.state_db, config.state_secret)
+    if config.state_backend != 'memory':
+        raise ValueError(f"Unknown STATE_BACKEND '{config.state_backend}' (expected memory or sqlite)")
+    return MemoryStateStore()
+
+state_store = create_state_store()
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)) + '}'
+
+class Histogram:
+    """Prometheus-style latency histogram with per-thread accumulators
+
+    ``observe`` only touches the calling thread's own counters, so recording
+    takes no lock; the registry lock is taken once per thread on its first
+    observation. The counters of threads that have exited are folded into a
+    retired total at collection, and also whenever the shard list doubles,
+    so short-lived request threads do not pile up between scrapes.
+    """
+
+    MIN_PRUNE_AT = 64
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._local = threading.local()
+        # (thread, {labels: [bucket counts..., +Inf count, sum, count]})
+        self._shards: List[Tuple[threading.Thread, Dict[Tuple, list]]] = []
+        self._retired: Dict[Tuple, list] = {}
+        self._prune_at = self.MIN_PRUNE_AT
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) >= self._prune_at:
+                    self._retire_dead_locked()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 3)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of the ``with`` block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    @staticmethod
+    def _merge(into: Dict[Tuple, list], shard: Dict[Tuple, list]):
+        for labels, counts in list(shard.items()):
+            total = into.setdefault(labels, [0] * len(counts))
+            for index, value in enumerate(counts):
+                total[index] += value
+
+    def _retire_dead_locked(self):
+        """Fold shards of exited threads into the retired total; caller must hold the lock"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+        self._prune_at = max(self.MIN_PRUNE_AT, 2 * len(live))
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            self._retire_dead_locked()
+            totals: Dict[Tuple, list] = {}
+            self._merge(totals, self._retired)
+            for _, shard in self._shards:
+                self._merge(totals, shard)
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {counts[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {counts[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Histograms plus counters/gauges read from live objects at scrape time"""
+
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        # (name, help, type, label names, callback returning [(label values, value)])
+        self._collectors: List[Tuple[str, str, str, Tuple[str, ...], object]] = []
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        histogram = Histogram(name, help_text, labelnames)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register(self, name: str, help_text: str, metric_type: str, labelnames: Tuple[str, ...], callback):
+        """Expose a counter or gauge whose samples ``callback`` returns as [(label values, value)]"""
+        self._collectors.append((name, help_text, metric_type, labelnames, callback))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.collect())
+        for name, help_text, metric_type, labelnames, callback in self._collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in callback():
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+connect_seconds = metrics.histogram(
+    'cisco_app_switch_connect_seconds', 'Time to connect to a switch', ('mode', 'result'))
+command_seconds = metrics.histogram(
+    'cisco_app_switch_command_seconds', 'Time a switch took to answer one command', ('method', 'command'))
+parse_seconds = metrics.histogram(
+    'cisco_app_parse_seconds', 'Time spent parsing show command output', ('command', 'parser'))
+mock_latency_seconds = metrics.histogram(
+    'cisco_app_mock_latency_seconds', 'Latency sampled for each mock switch operation, slept or only simulated',
+    ('operation', 'mode'))
+request_seconds = metrics.histogram(
+    'cisco_app_http_request_seconds', 'Time to handle an HTTP request', ('method', 'route', 'status'))
+
+class Span:
+    """One timed step of a trace"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'start', 'duration', 'error', '_started')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'attributes': self.attributes,
+            'start': self.start,
+            'duration': round(self.duration, 6) if self.duration is not None else None,
+            'error': self.error
         }
-        self.device_info = {
-            'hostname': 'MOCK-CISCO-SWITCH',
-            'model': 'WS-C2960-24TT-L',
-            'ios_version': '15.0(2)SE11',
-            'uptime': '1 day, 2 hours, 30 minutes'
+
+class TraceStore:
+    """Finished spans of the most recent ``capacity`` traces, grouped by trace ID
+
+    Spans arrive as they finish, so work a request hands to a background job
+    keeps adding to the request's trace after the response has been sent.
+    """
+
+    def __init__(self, capacity: int, max_spans: int):
+        self.capacity = capacity
+        self.max_spans = max_spans
+        self._traces: 'OrderedDict[str, List[Span]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.capacity:
+                    self._traces.popitem(last=False)
+            if len(spans) < self.max_spans:
+                spans.append(span)
+
+    def get(self, trace_id: str) -> Optional[List[Dict]]:
+        """Spans of one trace ordered by start time, or None if unknown"""
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            if spans is None:
+                return None
+            spans = list(spans)
+        return [span.to_dict() for span in sorted(spans, key=lambda span: span.start)]
+
+    def recent(self, limit: int) -> List[Dict]:
+        """Summaries of the newest traces, using each trace's root span"""
+        with self._lock:
+            traces = list(islice(reversed(self._traces.items()), limit))
+        summaries = []
+        for trace_id, spans in traces:
+            root = next((span for span in spans if span.parent_id is None), spans[0])
+            summaries.append({
+                'trace_id': trace_id,
+                'name': root.name,
+                'attributes': root.attributes,
+                'start': root.start,
+                'duration': round(root.duration, 6) if root.duration is not None else None,
+                'spans': len(spans)
+            })
+        return summaries
+
+trace_store = TraceStore(config.trace_capacity, config.trace_max_spans)
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+def begin_span(name: str, trace_id: Optional[str] = None, **attributes) -> Tuple[Span, contextvars.Token]:
+    """Start a span as a child of the current one (or a new trace) and make it current"""
+    parent = _current_span.get()
+    if trace_id is None:
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+    span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    return span, _current_span.set(span)
+
+def end_span(span: Span, token: contextvars.Token):
+    """Finish a span, restore its parent as current and store it"""
+    span.finish()
+    _current_span.reset(token)
+    trace_store.add(span)
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Time the ``with`` block as a child span; does nothing outside a trace"""
+    if _current_span.get() is None:
+        yield None
+        return
+    span, token = begin_span(name, **attributes)
+    try:
+        yield span
+    except Exception as e:
+        span.error = str(e)
+        raise
+    finally:
+        end_span(span, token)
+
+class ConnectionPool:
+    """Pool of authenticated netmiko sessions keyed by (ip, username, port)
+
+    Sessions are returned to the pool on disconnect instead of being torn
+    down, so reconnecting to a recently used switch skips the SSH handshake.
+    Idle sessions are closed after ``idle_ttl`` seconds and at most
+    ``max_size`` idle sessions are kept (least recently used are evicted).
+    Every open session, idle or in use, holds a slot of its switch's rate
+    limiter, which caps the sessions open to one switch.
+    """
+
+    def __init__(self, max_size: int, idle_ttl: int, keepalive: int):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.keepalive = keepalive
+        # key -> list of (connection, password digest, released_at), most recent last
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[object, str, float]]] = {}
+        # id(connection) -> the limiter whose session slot it holds
+        self._limiters: Dict[int, 'DeviceRateLimiter'] = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _digest(password: str) -> str:
+        return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+    def _close(self, connection):
+        try:
+            connection.disconnect()
+        except Exception as e:
+            logger.debug(f"Error closing pooled session: {str(e)}")
+        with self._lock:
+            limiter = self._limiters.pop(id(connection), None)
+        if limiter:
+            limiter.close_session()
+
+    def size(self) -> int:
+        """Number of idle sessions currently held"""
+        with self._lock:
+            return sum(len(entries) for entries in self._idle.values())
+
+    def acquire(self, ip: str, username: str, password: str, port: int = 22):
+        """Return a live session from the pool, or open a new one"""
+        key = (ip, username, port)
+        digest = self._digest(password)
+
+        while True:
+            with self._lock:
+                self._prune_locked(time.monotonic())
+                entries = self._idle.get(key, [])
+                candidate = None
+                for index in range(len(entries) - 1, -1, -1):
+                    if entries[index][1] == digest:
+                        candidate = entries.pop(index)[0]
+                        break
+                if not entries:
+                    self._idle.pop(key, None)
+
+            if candidate is None:
+                break
+            if candidate.is_alive():
+                logger.debug(f"Reusing pooled session for {username}@{ip}:{port}")
+                return candidate
+            self._close(candidate)
+
+        return self._open(ip, username, password, port)
+
+    def _open(self, ip: str, username: str, password: str, port: int):
+        from netmiko import ConnectHandler
+        
+        limiter = rate_limiters.get(f"{ip}:{port}")
+        if not limiter.open_session(timeout=0):
+            # Give an idle session's vty line to this one before queuing
+            self._evict_idle(ip, port)
+            if not limiter.open_session(config.connection_timeout):
+                raise SessionsBusy(
+                    f"All {limiter.profile.sessions} sessions to {ip}:{port} are busy, try again later")
+
+        device = {
+            'device_type': 'cisco_ios',
+            'ip': ip,
+            'username': username,
+            'password': password,
+            'port': port,
+            'timeout': config.connection_timeout,
+            'keepalive': self.keepalive
         }
+        try:
+            connection = ConnectHandler(**device)
+        except BaseException:
+            limiter.close_session()
+            raise
+        with self._lock:
+            self._limiters[id(connection)] = limiter
+        return connection
+    
+    def _evict_idle(self, ip: str, port: int):
+        """Close the least recently used idle session to a switch, whatever its username"""
+        with self._lock:
+            keys = [key for key in self._idle if key[0] == ip and key[2] == port]
+            if not keys:
+                return
+            oldest_key = min(keys, key=lambda k: self._idle[k][0][2])
+            stale = self._idle[oldest_key].pop(0)[0]
+            if not self._idle[oldest_key]:
+                del self._idle[oldest_key]
+        self._close(stale)
+
+    def release(self, ip: str, username: str, password: str, port: int, connection):
+        """Hand a session back to the pool, closing it if it cannot be kept"""
+        if self.max_size <= 0 or self.idle_ttl <= 0:
+            self._close(connection)
+            return
+
+        try:
+            alive = connection.is_alive()
+        except Exception:
+            alive = False
+        if not alive:
+            self._close(connection)
+            return
+
+        key = (ip, username, port)
+        evicted = []
+        with self._lock:
+            self._idle.setdefault(key, []).append((connection, self._digest(password), time.monotonic()))
+            evicted.extend(self._prune_locked(time.monotonic()))
+        for stale in evicted:
+            self._close(stale)
+        self._ensure_reaper()
+
+    def _prune_locked(self, now: float) -> List[object]:
+        """Drop expired and excess idle sessions; caller must hold the lock"""
+        evicted = []
+        for key in list(self._idle):
+            kept = []
+            for entry in self._idle[key]:
+                if now - entry[2] > self.idle_ttl:
+                    evicted.append(entry[0])
+                else:
+                    kept.append(entry)
+            if kept:
+                self._idle[key] = kept
+            else:
+                del self._idle[key]
+
+        total = sum(len(entries) for entries in self._idle.values())
+        while total > self.max_size:
+            oldest_key = min(self._idle, key=lambda k: self._idle[k][0][2])
+            evicted.append(self._idle[oldest_key].pop(0)[0])
+            if not self._idle[oldest_key]:
+                del self._idle[oldest_key]
+            total -= 1
+
+        return evicted
+
+    def _ensure_reaper(self):
+        """Start the background thread that closes idle sessions past their TTL"""
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._stop.clear()
+        self._reaper = threading.Thread(target=self._reap, name='ssh-pool-reaper', daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        interval = max(1, min(self.idle_ttl, 60))
+        while not self._stop.wait(interval):
+            with self._lock:
+                evicted = self._prune_locked(time.monotonic())
+                empty = not self._idle
+            for stale in evicted:
+                self._close(stale)
+            if empty:
+                return
+
+    def close_all(self):
+        """Close every idle session"""
+        with self._lock:
+            evicted = [entry[0] for entries in self._idle.values() for entry in entries]
+            self._idle.clear()
+        for stale in evicted:
+            self._close(stale)
+
+connection_pool = ConnectionPool(config.pool_max_size, config.pool_idle_ttl, config.ssh_keepalive)
+
+class CircuitBreaker:
+    """Per-switch circuit breaker for connection attempts
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    connects fail fast. Once the backoff elapses one probe is let through
+    (half-open); success closes the circuit, failure reopens it with the
+    backoff doubled, up to ``max_delay``, with jitter so many dead switches
+    are not retried in lockstep.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, key: str, failure_threshold: int, base_delay: float, max_delay: float):
+        self.key = key
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_until = 0.0
+        self.last_failure: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> Tuple[bool, float]:
+        """Whether an attempt may proceed, and if not how many seconds until it may"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True, 0.0
+            now = time.monotonic()
+            if self.state == self.OPEN and now >= self.opened_until:
+                self.state = self.HALF_OPEN
+                return True, 0.0
+            return False, max(0.0, self.opened_until - now)
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trips = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.last_failure = time.time()
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                delay = min(self.max_delay, self.base_delay * (2 ** self.trips))
+                # Jitter between half and the full backoff
+                self.opened_until = time.monotonic() + random.uniform(delay / 2, delay)
+                self.state = self.OPEN
+                self.trips += 1
+    
+    def release_probe(self):
+        """Give back a half-open probe whose attempt never reached the switch"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_until = time.monotonic()
+    
+    def reset(self):
+        self.record_success()
+    
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'key': self.key,
+                'state': self.state,
+                'failures': self.failures,
+                'trips': self.trips,
+                'retry_after': round(max(0.0, self.opened_until - time.monotonic()), 1)
+                if self.state == self.OPEN else 0.0,
+                'last_failure': self.last_failure
+            }
+
+class CircuitBreakerRegistry:
+    """Creates and holds one CircuitBreaker per switch"""
+    
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(key, config.breaker_failure_threshold,
+                                                     config.breaker_base_delay, config.breaker_max_delay)
+            return self._breakers[key]
+    
+    def find(self, key: str) -> Optional[CircuitBreaker]:
+        with self._lock:
+            return self._breakers.get(key)
+    
+    def all(self) -> List[CircuitBreaker]:
+        with self._lock:
+            return list(self._breakers.values())
+
+circuit_breakers = CircuitBreakerRegistry()
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding at most ``burst``
+
+    ``acquire`` never rejects: each caller reserves its token, letting the
+    bucket go into debt, and sleeps until the debt is repaid, so waiters are
+    served in arrival order at exactly ``rate``. A rate of 0 disables it.
+    """
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens``, waiting as long as needed; returns the seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def configure(self, rate: float, burst: float):
+        """Change the rate and burst, keeping the tokens (or debt) accrued so far"""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = rate
+            self.burst = max(1.0, burst)
+            self._tokens = min(self.burst, self._tokens)
+
+class RateLimitProfile:
+    """Command rate and session limits for switch models matching a glob pattern"""
+    
+    def __init__(self, pattern: str, rate: float, burst: float, sessions: int):
+        self.pattern = pattern
+        self.rate = rate
+        self.burst = burst
+        self.sessions = sessions
+    
+    @classmethod
+    def parse_all(cls, spec: str) -> List['RateLimitProfile']:
+        """Parse ``PATTERN=RATE,BURST,SESSIONS`` entries separated by ``;``"""
+        profiles = []
+        for entry in filter(None, (part.strip() for part in spec.split(';'))):
+            pattern, _, values = entry.rpartition('=')
+            parts = [value.strip() for value in values.split(',')]
+            if not pattern or len(parts) != 3:
+                raise ValueError(f"Rate limit '{entry}' must look like PATTERN=RATE,BURST,SESSIONS")
+            profiles.append(cls(pattern.strip(), float(parts[0]), float(parts[1]), int(parts[2])))
+        return profiles
+    
+    def matches(self, model: Optional[str]) -> bool:
+        if model is None:
+            return self.pattern == '*'
+        return fnmatch.fnmatchcase(model.upper(), self.pattern.upper())
+
+class SessionsBusy(ConnectionError):
+    """Every session slot for a switch stayed in use; says nothing about the switch's health"""
+
+class DeviceRateLimiter:
+    """Paces the commands sent to one switch and caps its open SSH sessions
+
+    Commands from all of the switch's sessions start at no more than the
+    profile's rate, queuing in arrival order. Every SSH session opened to the
+    switch, idle pooled ones included, holds one of ``sessions`` slots (a vty
+    line) until it is closed. The profile is changed in place, so sessions
+    keep sharing one limiter once the switch model is known.
+    """
+    
+    def __init__(self, key: str, profile: RateLimitProfile):
+        self.key = key
+        self.profile = profile
+        self.bucket = TokenBucket(profile.rate, profile.burst)
+        self.open_sessions = 0
+        self.waiting = 0
+        self._lock = threading.Lock()
+        self._session_closed = threading.Condition(self._lock)
+    
+    def update(self, profile: RateLimitProfile):
+        """Apply another profile without resetting the bucket or the open session count"""
+        self.bucket.configure(profile.rate, profile.burst)
+        with self._lock:
+            self.profile = profile
+            self._session_closed.notify_all()
+    
+    def throttle(self):
+        """Wait for this command's token"""
+        started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+        try:
+            self.bucket.acquire()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        rate_limit_wait_seconds.observe(time.perf_counter() - started, self.profile.pattern)
+    
+    def open_session(self, timeout: Optional[float] = None) -> bool:
+        """Take a session slot, waiting up to ``timeout`` seconds; False if none freed up"""
+        with self._lock:
+            if not self._session_closed.wait_for(
+                    lambda: self.profile.sessions <= 0 or self.open_sessions < self.profile.sessions, timeout):
+                return False
+            self.open_sessions += 1
+            return True
+    
+    def close_session(self):
+        with self._lock:
+            self.open_sessions = max(0, self.open_sessions - 1)
+            self._session_closed.notify()
+
+class RateLimiterRegistry:
+    """Holds one DeviceRateLimiter per switch, using the first profile matching its model
+
+    Models are remembered per switch, so they are read once per process
+    rather than on every connect.
+    """
+    
+    def __init__(self, profiles: List[RateLimitProfile]):
+        self.profiles = profiles
+        self._limiters: Dict[str, DeviceRateLimiter] = {}
+        self._models: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def needs_model(self) -> bool:
+        """Whether any profile depends on the switch model"""
+        return any(profile.pattern != '*' for profile in self.profiles)
+    
+    def profile_for(self, model: Optional[str]) -> RateLimitProfile:
+        for profile in self.profiles:
+            if profile.matches(model):
+                return profile
+        return RateLimitProfile('*', 0, 1, 0)
+    
+    def get(self, key: str) -> DeviceRateLimiter:
+        """Return the switch's limiter, created on first use"""
+        with self._lock:
+            return self._get_locked(key)
+    
+    def _get_locked(self, key: str) -> DeviceRateLimiter:
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters[key] = DeviceRateLimiter(key, self.profile_for(self._models.get(key)))
+        return limiter
+    
+    def knows_model(self, key: str) -> bool:
+        with self._lock:
+            return key in self._models
+    
+    def model(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._models.get(key)
+    
+    def set_model(self, key: str, model: Optional[str]) -> DeviceRateLimiter:
+        """Remember the switch's model and move its limiter to the matching profile"""
+        profile = self.profile_for(model)
+        with self._lock:
+            self._models[key] = model
+            limiter = self._get_locked(key)
+        if limiter.profile is not profile:
+            limiter.update(profile)
+        return limiter
+    
+    def all(self) -> List[DeviceRateLimiter]:
+        with self._lock:
+            return list(self._limiters.values())
+
+rate_limit_wait_seconds = metrics.histogram(
+    'cisco_app_rate_limit_wait_seconds', 'Time a switch command queued behind its rate limiter', ('profile',))
+rate_limiters = RateLimiterRegistry(RateLimitProfile.parse_all(config.rate_limits))
+
+class TTLCache:
+    """Thread-safe key/value cache whose entries expire after ``ttl`` seconds
+
+    Tuple keys are also indexed by their first element, so a whole group
+    (e.g. every interface of a device) can be dropped without a scan.
+    """
+    
+    def __init__(self, ttl: float, name: str = 'cache'):
+        self.ttl = ttl
+        self.name = name
+        self._entries: Dict[object, Tuple[object, float]] = {}
+        self._groups: Dict[object, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key) -> Optional[Tuple[object, float]]:
+        """Return (value, age in seconds) for a fresh entry, or None"""
+        with trace_span('cache', cache=self.name) as span, self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[1]
+                if age <= self.ttl:
+                    self.hits += 1
+                    if span:
+                        span.attributes['hit'] = True
+                    return entry[0], age
+                self._remove_locked(key)
+            self.misses += 1
+            if span:
+                span.attributes['hit'] = False
+            return None
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            if isinstance(key, tuple):
+                self._groups.setdefault(key[0], set()).add(key)
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._remove_locked(key)
+    
+    def _remove_locked(self, key):
+        self._entries.pop(key, None)
+        if isinstance(key, tuple):
+            group = self._groups.get(key[0])
+            if group is not None:
+                group.discard(key)
+                if not group:
+                    del self._groups[key[0]]
+    
+    def invalidate_group(self, first):
+        """Drop every tuple key whose first element is ``first``"""
+        with self._lock:
+            for key in self._groups.pop(first, ()):
+                self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+class SharedTTLCache:
+    """TTLCache with the same interface, stored in a shared state store
+
+    Keys are JSON-encoded (tuples come back as lists) and ages use wall-clock
+    time so every worker process agrees on them. Hit/miss counters are per
+    process.
+    """
+    
+    def __init__(self, store: 'SQLiteStateStore', ttl: float, name: str):
+        self.store = store
+        self.ttl = ttl
+        self.name = name
+        self.namespace = f"cache:{name}"
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key) -> Optional[Tuple[object, float]]:
+        """Return (value, age in seconds) for a fresh entry, or None"""
+        with trace_span('cache', cache=self.name) as span:
+            entry = self.store.get(self.namespace, json.dumps(key))
+            if entry is not None:
+                age = time.time() - entry[1]
+                if age <= self.ttl:
+                    self.hits += 1
+                    if span:
+                        span.attributes['hit'] = True
+                    return entry[0], age
+                self.store.delete(self.namespace, json.dumps(key))
+            self.misses += 1
+            if span:
+                span.attributes['hit'] = False
+            return None
+    
+    def set(self, key, value):
+        self.store.set(self.namespace, json.dumps(key), [value, time.time()])
+    
+    def invalidate(self, key):
+        self.store.delete(self.namespace, json.dumps(key))
+    
+    def invalidate_group(self, first):
+        """Drop every tuple key whose first element is ``first``"""
+        # json.dumps((first, x)) always starts with json.dumps([first]) minus its closing bracket and ', '
+        self.store.delete_prefix(self.namespace, json.dumps([first])[:-1] + ', ')
+    
+    def clear(self):
+        self.store.clear(self.namespace)
+
+class MockLatency:
+    """Latency distribution for simulated switch operations
+
+    Parsed from a spec string: ``none``, ``fixed:SECONDS``, ``uniform:LOW,HIGH``
+    or ``lognormal:MEDIAN,SIGMA``. By default latency is only accounted for
+    (added to the switch's simulated time) so mock calls never hold a worker
+    thread; ``blocking`` makes each call actually sleep for the sampled delay.
+    """
+
+    KINDS = ('none', 'fixed', 'uniform', 'lognormal')
+
+    def __init__(self, spec: str = 'none', blocking: bool = False):
+        kind, _, params = spec.strip().lower().partition(':')
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(value) for value in params.split(',') if value.strip()]
+        expected = {'none': 0, 'fixed': 1, 'uniform': 2, 'lognormal': 2}[kind]
+        if len(self.params) != expected:
+            raise ValueError(f"Latency '{kind}' takes {expected} parameter(s)")
+        self.blocking = blocking
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one delay in seconds"""
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params)
+        if self.kind == 'lognormal':
+            median, sigma = self.params
+            return median * rng.lognormvariate(0, sigma)
+        return 0.0
+
+class MockCiscoSwitch:
+    """Mock Cisco switch for testing purposes
+
+    Each instance is one session; the port security state and device info
+    are shared with every other session to the same mock device.
+    """
+    
+    def __init__(self, interfaces: Optional[Dict[str, Dict]] = None, device_info: Optional[Dict] = None,
+                 latency: Optional[MockLatency] = None, seed: Optional[int] = None):
+        if interfaces is None:
+            interfaces, device_info = generate_mock_device('MOCK-CISCO-SWITCH', seed=seed)
+        self.interfaces = interfaces
+        self.device_info = device_info or {}
+        self.latency = latency or MockLatency()
+        self.simulated_time = 0.0
+        self._rng = random.Random(seed)
         self.connected = False
     
+    def _delay(self, operation: str):
+        """Account for (and optionally wait out) one operation's latency"""
+        delay = self.latency.sample(self._rng)
+        self.simulated_time += delay
+        mock_latency_seconds.observe(delay, operation, 'blocking' if self.latency.blocking else 'simulated')
+        if self.latency.blocking and delay > 0:
+            time.sleep(delay)
+    
     def connect(self) -> bool:
         """Simulate connection to switch"""
-        time.sleep(1)  # Simulate connection delay
+        self._delay('connect')
         self.connected = True
         return True
     
     def disconnect(self):
         """Simulate disconnection"""
-        time.sleep(0.5)
+        self._delay('disconnect')
         self.connected = False
         
     def get_interface_status(self, interface: str) -> Dict:
         """Get port security status for an interface"""
+        self._delay('get_interface_status')
         if interface in self.interfaces:
-            return self.interfaces[interface]
+            return dict(self.interfaces[interface])
         else:
             raise ValueError(f"Interface {interface} not found")
     
+    def _enable(self, interface: str, max_mac: int, violation_action: str):
+        self.interfaces[interface]['port_security'] = True
+        self.interfaces[interface]['max_mac_addresses'] = max_mac
+        self.interfaces[interface]['violation_action'] = violation_action
+    
+    def _disable(self, interface: str):
+        self.interfaces[interface]['port_security'] = False
+        self.interfaces[interface]['learned_mac_addresses'] = []
+    
     def enable_port_security(self, interface: str, max_mac: int = 1, violation_action: str = 'shutdown') -> str:
         """Enable port security on an interface"""
+        self._delay('enable_port_security')
         if interface not in self.interfaces:
             raise ValueError(f"Interface {interface} not found")
         
-        self.interfaces[interface]['port_security'] = True
-        self.interfaces[interface]['max_mac_addresses'] = max_mac
-        self.interfaces[interface]['violation_action'] = violation_action
+        self._enable(interface, max_mac, violation_action)
         
         return f"Port security enabled on {interface} with max MAC addresses: {max_mac}, violation action: {violation_action}"
     
     def disable_port_security(self, interface: str) -> str:
         """Disable port security on an interface"""
+        self._delay('disable_port_security')
         if interface not in self.interfaces:
             raise ValueError(f"Interface {interface} not found")
         
-        self.interfaces[interface]['port_security'] = False
-        self.interfaces[interface]['learned_mac_addresses'] = []
+        self._disable(interface)
         
         return f"Port security disabled on {interface}"
     
     def clear_port_security(self, interface: str) -> str:
         """Clear port security violations"""
+        self._delay('clear_port_security')
         if interface not in self.interfaces:
             raise ValueError(f"Interface {interface} not found")
         
@@ -156,16 +1384,691 @@ class MockCiscoSwitch:
         
         return f"Port security cleared on {interface}"
     
+    def configure_port_security_batch(self, changes: List[Dict]) -> str:
+        """Apply many enable/disable changes at once"""
+        self._delay('configure_port_security_batch')
+        for change in changes:
+            if change['interface'] not in self.interfaces:
+                raise ValueError(f"Interface {change['interface']} not found")
+        
+        for change in changes:
+            if change['action'] == 'enable':
+                self._enable(change['interface'], change.get('max_mac', 1),
+                             change.get('violation_action', 'shutdown'))
+            else:
+                self._disable(change['interface'])
+        
+        return f"Port security updated on {len(changes)} interfaces"
+    
+    def get_all_interface_status(self) -> Dict[str, Dict]:
+        """Get port security status for every interface"""
+        self._delay('get_all_interface_status')
+        return {name: dict(settings) for name, settings in self.interfaces.items()}
+    
     def get_all_interfaces(self) -> List[str]:
         """Get list of all interfaces"""
+        self._delay('get_all_interfaces')
         return list(self.interfaces.keys())
     
     def get_device_info(self) -> Dict:
         """Get device information"""
-        return self.device_info
+        return dict(self.device_info, simulated_time=round(self.simulated_time, 3))
+
+VIOLATION_ACTIONS = ('shutdown', 'restrict', 'protect')
+
+def generate_mock_device(hostname: str, members: int = 1, ports: int = 24, secured_ratio: float = 0.5,
+                         seed=None) -> Tuple[Dict[str, Dict], Dict]:
+    """Build a seeded random port security state for one mock switch
+
+    Interfaces are named like a standalone switch (``GigabitEthernet0/1``)
+    when ``members`` is 1 and like a stack (``GigabitEthernet2/0/1``)
+    otherwise.
+    """
+    rng = random.Random(seed)
+    interfaces = {}
+    for member in range(1, members + 1):
+        for port in range(1, ports + 1):
+            name = f"GigabitEthernet0/{port}" if members == 1 else f"GigabitEthernet{member}/0/{port}"
+            secured = rng.random() < secured_ratio
+            roll = rng.random()
+            status = 'up' if roll < 0.7 else ('down' if roll < 0.95 else 'err-disabled')
+            max_mac = 1 + int(rng.random() * 3) if secured else 1
+            learned = []
+            if secured and status != 'down':
+                for _ in range(int(rng.random() * (max_mac + 1))):
+                    digits = f"{rng.getrandbits(48):012X}"
+                    learned.append(':'.join(digits[i:i + 2] for i in range(0, 12, 2)))
+            interfaces[name] = {
+                'port_security': secured,
+                'max_mac_addresses': max_mac,
+                'violation_action': VIOLATION_ACTIONS[int(rng.random() * 3)],
+                'learned_mac_addresses': learned,
+                'status': status
+            }
+    device_info = {
+        'hostname': hostname,
+        'model': f"WS-C2960X-{ports}PS-L" if members == 1 else f"WS-C3850-{ports}P ({members}-member stack)",
+        'ios_version': '15.2(7)E4',
+        'uptime': f"{rng.randint(1, 400)} days, {rng.randint(0, 23)} hours"
+    }
+    return interfaces, device_info
+
+class MockFleet:
+    """Generator of mock switches, one stable device per IP
+
+    The first connect to an IP builds that switch's seeded initial state;
+    later sessions to the same IP share it, so changes survive reconnects
+    the way they would on real hardware. Thousands of devices are cheap:
+    state is built lazily and mock calls do not sleep unless the latency
+    is configured as blocking.
+    """
+    
+    def __init__(self, members: int, ports: int, seed: int, latency: MockLatency, secured_ratio: float = 0.5):
+        self.members = members
+        self.ports = ports
+        self.seed = seed
+        self.latency = latency
+        self.secured_ratio = secured_ratio
+        self._devices: Dict[str, Tuple[Dict[str, Dict], Dict]] = {}
+        self._lock = threading.Lock()
+    
+    def create_switch(self, ip: str) -> MockCiscoSwitch:
+        """Return a new, unconnected session to the mock device at ``ip``"""
+        with self._lock:
+            state = self._devices.get(ip)
+            if state is None:
+                hostname = 'MOCK-' + ip.replace('.', '-')
+                state = generate_mock_device(hostname, self.members, self.ports, self.secured_ratio,
+                                             seed=f"{self.seed}:{ip}")
+                self._devices[ip] = state
+        interfaces, device_info = state
+        return MockCiscoSwitch(interfaces, device_info, self.latency, seed=f"{self.seed}:{ip}:{uuid.uuid4()}")
+    
+    def addresses(self, count: int, start: str = '10.0.0.1') -> List[str]:
+        """Consecutive IPv4 addresses for a fleet of ``count`` devices"""
+        first = int(ipaddress.IPv4Address(start))
+        return [str(ipaddress.IPv4Address(first + index)) for index in range(count)]
+    
+    def reset(self):
+        """Forget all generated device state"""
+        with self._lock:
+            self._devices.clear()
+    
+    def size(self) -> int:
+        with self._lock:
+            return len(self._devices)
+
+mock_fleet = MockFleet(config.mock_members, config.mock_ports, config.mock_seed,
+                       MockLatency(config.mock_latency, config.mock_latency_blocking),
+                       config.mock_secured_ratio)
+
+# Abbreviations IOS uses in table output, mapped to full interface names
+INTERFACE_PREFIXES = {
+    'Gi': 'GigabitEthernet',
+    'Fa': 'FastEthernet',
+    'Te': 'TenGigabitEthernet',
+    'Tw': 'TwoGigabitEthernet',
+    'Fi': 'FiveGigabitEthernet',
+    'Twe': 'TwentyFiveGigE',
+    'Fo': 'FortyGigabitEthernet',
+    'Hu': 'HundredGigE',
+    'Eth': 'Ethernet',
+    'Po': 'Port-channel',
+}
+
+INTERFACE_NAME_RE = re.compile(r'^([A-Za-z-]+?)(\d+(?:/\d+)*(?:\.\d+)?)$')
+
+def expand_interface_name(name: str) -> str:
+    """Expand an abbreviated interface name (``Gi0/1``) to its full form"""
+    match = INTERFACE_NAME_RE.match(name)
+    if not match:
+        return name
+    prefix, number = match.groups()
+    return INTERFACE_PREFIXES.get(prefix, prefix) + number
+
+INTERFACE_ABBREVIATIONS = {full: short for short, full in INTERFACE_PREFIXES.items()}
+
+INTERFACE_PORT_RE = re.compile(r'^([A-Za-z-]+)((?:\d+/)*)(\d+)$')
+
+# IOS accepts at most five comma-separated ranges per "interface range" command
+MAX_INTERFACE_RANGES = 5
+
+def compress_interface_ranges(interfaces: List[str], max_ranges: int = MAX_INTERFACE_RANGES) -> List[str]:
+    """Compress interface names into "interface range" arguments
+
+    ``[Gi1/0/1, ..., Gi1/0/24, Gi1/0/30]`` becomes ``['Gi1/0/1 - 24 , Gi1/0/30']``.
+    Consecutive ports on the same module collapse into one range, and each
+    returned argument holds at most ``max_ranges`` ranges.
+    """
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    unspanned = []
+    for name in interfaces:
+        full_name = expand_interface_name(name)
+        match = INTERFACE_PORT_RE.match(full_name)
+        if not match:
+            # Subinterfaces and unusual names cannot be part of a span
+            if full_name not in unspanned:
+                unspanned.append(full_name)
+            continue
+        kind, module, port = match.groups()
+        groups.setdefault((INTERFACE_ABBREVIATIONS.get(kind, kind), module), []).append(int(port))
+    
+    ranges = []
+    for (kind, module), ports in groups.items():
+        ports = sorted(set(ports))
+        start = previous = ports[0]
+        for port in ports[1:] + [None]:
+            if port is not None and port == previous + 1:
+                previous = port
+                continue
+            ranges.append(f"{kind}{module}{start}" + (f" - {previous}" if previous != start else ""))
+            if port is not None:
+                start = previous = port
+    ranges.extend(unspanned)
+    
+    return [' , '.join(ranges[i:i + max_ranges]) for i in range(0, len(ranges), max_ranges)]
+
+# Upper bound accepted for "switchport port-security maximum"; platforms enforce their own lower limits
+MAX_SECURE_MAC_ADDRESSES = 8192
+
+def validate_interface_name(interface) -> str:
+    """Reject anything but a plain interface name (``Gi1/0/1``) before it reaches a CLI line"""
+    if not isinstance(interface, str) or not INTERFACE_NAME_RE.fullmatch(interface):
+        raise ValueError(f"Invalid interface name: {interface!r}")
+    return interface
+
+def validate_port_security_args(interface, action, max_mac=1, violation_action='shutdown') -> Dict:
+    """Check a port security action's arguments before they are written into CLI lines
+
+    Returns the keyword arguments the action takes (``max_mac`` as an int and
+    ``violation_action`` for enable, nothing otherwise). Raises ValueError for
+    anything that is not a plain interface name, known action or setting.
+    """
+    validate_interface_name(interface)
+    return validate_port_security_settings(action, max_mac, violation_action)
+
+def validate_port_security_settings(action, max_mac=1, violation_action='shutdown') -> Dict:
+    """Check an action and its enable settings; see ``validate_port_security_args``"""
+    if action not in PORT_SECURITY_ACTIONS:
+        raise ValueError(f"Unknown action: {action}")
+    if action != 'enable':
+        return {}
+    
+    if isinstance(max_mac, str) and max_mac.isdigit():
+        max_mac = int(max_mac)
+    if isinstance(max_mac, bool) or not isinstance(max_mac, int) or not 1 <= max_mac <= MAX_SECURE_MAC_ADDRESSES:
+        raise ValueError(f"max_mac must be an integer from 1 to {MAX_SECURE_MAC_ADDRESSES}")
+    if not isinstance(violation_action, str) or violation_action.lower() not in VIOLATION_ACTIONS:
+        raise ValueError(f"violation_action must be one of {', '.join(VIOLATION_ACTIONS)}")
+    return {'max_mac': max_mac, 'violation_action': violation_action.lower()}
+
+def build_port_security_batch(changes: List[Dict]) -> List[str]:
+    """Build config lines for many enable/disable changes, grouping identical settings into ranges"""
+    groups: Dict[Tuple, List[str]] = {}
+    for change in changes:
+        if change.get('action') not in ('enable', 'disable'):
+            raise ValueError(f"Batch action must be enable or disable, not {change.get('action')}")
+        kwargs = validate_port_security_args(change.get('interface'), change['action'],
+                                             change.get('max_mac', 1), change.get('violation_action', 'shutdown'))
+        if change['action'] == 'enable':
+            key = ('enable', kwargs['max_mac'], kwargs['violation_action'])
+        else:
+            key = ('disable',)
+        groups.setdefault(key, []).append(change['interface'])
+    
+    commands = []
+    for key, interfaces in groups.items():
+        for interface_range in compress_interface_ranges(interfaces):
+            commands.append(f"interface range {interface_range}")
+            if key[0] == 'enable':
+                commands.extend([
+                    "switchport port-security",
+                    f"switchport port-security maximum {key[1]}",
+                    f"switchport port-security violation {key[2]}"
+                ])
+            else:
+                commands.append("no switchport port-security")
+            commands.append("exit")
+    return commands
+
+def format_mac_address(mac: str) -> str:
+    """Normalize a MAC address (``0011.2233.4455``) to ``00:11:22:33:44:55``"""
+    digits = re.sub(r'[^0-9A-Fa-f]', '', mac).upper()
+    if len(digits) != 12:
+        return mac
+    return ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
+
+TEXTFSM_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'textfsm_templates')
+
+# Show commands the app parses, mapped to their TextFSM template
+PARSER_TEMPLATES = {
+    'show interfaces status': 'cisco_ios_show_interfaces_status.textfsm',
+    'show port-security': 'cisco_ios_show_port-security.textfsm',
+    'show port-security address': 'cisco_ios_show_port-security_address.textfsm',
+}
+
+class TextFSMParser:
+    """Parses show command output into records with TextFSM
+
+    Templates are looked up in the bundled ``textfsm_templates`` directory,
+    then ``NET_TEXTFSM``, then the ntc-templates package. Each template is read
+    once. A TextFSM object carries parse state, so compiled FSMs are kept in
+    a shared pool per command and each parse checks one out; the pool grows
+    only to the number of concurrent parses, whichever threads run them.
+    """
+    
+    def __init__(self, templates: Dict[str, str]):
+        self.templates = templates
+        self._sources: Dict[str, str] = {}
+        # command -> compiled FSMs not currently parsing
+        self._idle: Dict[str, List] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _template_dirs() -> List[str]:
+        dirs = [TEXTFSM_TEMPLATE_DIR]
+        if os.getenv('NET_TEXTFSM'):
+            dirs.append(os.getenv('NET_TEXTFSM'))
+        try:
+            import ntc_templates
+            dirs.append(os.path.join(os.path.dirname(ntc_templates.__file__), 'templates'))
+        except ImportError:
+            pass
+        return dirs
+    
+    def _source(self, command: str) -> str:
+        """Return template text for a command, reading it from disk only once"""
+        with self._lock:
+            if command not in self._sources:
+                name = self.templates[command]
+                for directory in self._template_dirs():
+                    path = os.path.join(directory, name)
+                    if os.path.exists(path):
+                        with open(path) as template:
+                            self._sources[command] = template.read()
+                        break
+                else:
+                    raise FileNotFoundError(f"TextFSM template {name} not found")
+            return self._sources[command]
+    
+    @contextmanager
+    def _fsm(self, command: str):
+        """Check out a compiled FSM for a command, compiling one only if all are in use"""
+        import textfsm
+        
+        with self._lock:
+            idle = self._idle.get(command)
+            fsm = idle.pop() if idle else None
+        if fsm is None:
+            fsm = textfsm.TextFSM(io.StringIO(self._source(command)))
+        try:
+            yield fsm
+        finally:
+            fsm.Reset()
+            with self._lock:
+                self._idle.setdefault(command, []).append(fsm)
+    
+    def parse(self, command: str, output: str) -> List[Dict]:
+        """Parse command output into a list of records with lowercase field names"""
+        with self._fsm(command) as fsm:
+            header = [name.lower() for name in fsm.header]
+            return [dict(zip(header, row)) for row in fsm.ParseText(output)]
+
+textfsm_parser = TextFSMParser(PARSER_TEMPLATES)
+
+class RegexParser:
+    """Precompiled-regex fast path for the show commands the app issues
+
+    Produces the same records as the TextFSM templates. ``parse`` returns None
+    as soon as a line matches neither a data row nor a known header, so the
+    caller can fall back to TextFSM for output it does not recognize.
+    """
+    
+    def __init__(self, specs: Dict[str, Dict]):
+        self.specs = specs
+    
+    def parse(self, command: str, output: str) -> Optional[List[Dict]]:
+        spec = self.specs.get(command)
+        if spec is None:
+            return None
+        row_match = spec['row'].match
+        skip_match = spec['skip'].match
+        empty = dict.fromkeys(spec['fields'], '')
+        records = []
+        for line in output.splitlines():
+            match = row_match(line)
+            if match:
+                records.append({**empty, **match.groupdict('')})
+            elif not skip_match(line):
+                return None
+        return records
+    
+regex_parser = RegexParser({
+    'show interfaces status': {
+        'fields': ['port', 'name', 'status', 'vlan_id', 'duplex', 'speed', 'type', 'fc_mode'],
+        'row': re.compile(
+            r'^\s*(?P<port>\S+)\s+(?:(?P<name>.*?)\s+)?'
+            r'(?P<status>err-disabled|disabled|connected|notconnect|inactive|up|down|monitoring|suspended)\s+'
+            r'(?P<vlan_id>\d+(?:,\d+)*|trunk|routed|unassigned)\s+(?P<duplex>\S+)\s+(?P<speed>\S+)'
+            r'(?:\s+(?P<type>.*?))?\s*$'
+        ),
+        'skip': re.compile(r'^\s*$|^Port\s+Name\s+Status|^-+\s*$|^Load\s+for\s|^Time\s+source\s+is')
+    },
+    'show port-security': {
+        'fields': ['interface', 'max_secure_addresses', 'current_addresses', 'violation_count', 'security_action'],
+        'row': re.compile(
+            r'^\s*(?P<interface>\S+)\s+(?P<max_secure_addresses>\d+)\s+(?P<current_addresses>\d+)\s+'
+            r'(?P<violation_count>\d+)\s+(?P<security_action>[Pp]rotect|[Rr]estrict|[Ss]hutdown(?:-[Vv]lan)?)\s*$'
+        ),
+        'skip': re.compile(r'^\s*$|^\s*Secure\s+Port\s+MaxSecureAddr|^\s*\(Count\)|^-+\s*$|^Total\s+Addresses|^Max\s+Addresses')
+    },
+    'show port-security address': {
+        'fields': ['vlan', 'mac_address', 'type', 'port', 'remaining_age'],
+        'row': re.compile(
+            r'^\s*(?P<vlan>\d+)\s+(?P<mac_address>[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4})\s+'
+            r'(?P<type>\S+)\s+(?P<port>\S+)(?:\s+(?P<remaining_age>\S+))?\s*$'
+        ),
+        'skip': re.compile(r'^[-\s]*$|^\s*Secure\s+Mac\s+Address\s+Table|^\s*Vlan\s+Mac\s+Address|^\s*\(mins\)|^Total\s+Addresses')
+    },
+})
+
+def parse_show_output(command: str, output: str) -> List[Dict]:
+    """Parse show command output with the regex fast path, falling back to TextFSM"""
+    with trace_span('parse', command=command) as span:
+        started = time.perf_counter()
+        records = regex_parser.parse(command, output)
+        parser = 'regex'
+        if records is None:
+            logger.debug(f"Fast-path parser did not recognize '{command}' output, using TextFSM")
+            records = textfsm_parser.parse(command, output)
+            parser = 'textfsm'
+        parse_seconds.observe(time.perf_counter() - started, command, parser)
+        if span:
+            span.attributes.update(parser=parser, records=len(records))
+        return records
+
+def parse_interfaces_status(output: str) -> Dict[str, str]:
+    """Parse "show interfaces status" into {interface: link state}"""
+    return {
+        expand_interface_name(record['port']): record['status']
+        for record in parse_show_output('show interfaces status', output)
+    }
+
+def parse_port_security(output: str) -> Dict[str, Dict]:
+    """Parse the "show port-security" table into per-interface settings"""
+    return {
+        expand_interface_name(record['interface']): {
+            'max_mac_addresses': int(record['max_secure_addresses']),
+            'current_addresses': int(record['current_addresses']),
+            'violation_count': int(record['violation_count']),
+            'violation_action': record['security_action'].lower()
+        }
+        for record in parse_show_output('show port-security', output)
+    }
+
+def parse_port_security_addresses(output: str) -> Dict[str, List[str]]:
+    """Parse "show port-security address" into {interface: [MAC addresses]}"""
+    addresses: Dict[str, List[str]] = {}
+    for record in parse_show_output('show port-security address', output):
+        addresses.setdefault(expand_interface_name(record['port']), []).append(
+            format_mac_address(record['mac_address'])
+        )
+    return addresses
+
+def build_port_security_status(states: Dict[str, str], ports: Dict[str, Dict],
+                               addresses: Dict[str, List[str]]) -> Dict[str, Dict]:
+    """Combine parsed show outputs into the per-interface status records the API returns"""
+    status = {}
+    for interface in list(states) + [name for name in ports if name not in states]:
+        settings = ports.get(interface)
+        state = states.get(interface, 'unknown')
+        status[interface] = {
+            'port_security': settings is not None,
+            'max_mac_addresses': settings['max_mac_addresses'] if settings else 1,
+            'violation_action': settings['violation_action'] if settings else 'shutdown',
+            'learned_mac_addresses': addresses.get(interface, []),
+            'status': 'up' if state == 'connected' else ('err-disabled' if state == 'err-disabled' else 'down')
+        }
+    return status
+
+# Priorities for commands queued on a device worker; lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+_command_priority = contextvars.ContextVar('command_priority', default=PRIORITY_INTERACTIVE)
+
+@contextmanager
+def command_priority(priority: int):
+    """Queue device commands issued inside this block at the given priority"""
+    token = _command_priority.set(priority)
+    try:
+        yield
+    finally:
+        _command_priority.reset(token)
+
+class DeviceWorker:
+    """Single thread that owns a device session and runs calls on it one at a time
+
+    netmiko channels are not thread-safe, so every call on a session is queued
+    here and executed in priority order (FIFO within a priority). Callers get a
+    Future back. The thread exits after ``idle_timeout`` seconds without work
+    and is restarted by the next submit.
+    """
+    
+    def __init__(self, name: str, idle_timeout: float):
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self._queue = PriorityQueue()
+        self._sequence = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def submit(self, fn, *args, priority: Optional[int] = None, **kwargs) -> Future:
+        future = Future()
+        if threading.current_thread() is self._thread:
+            # Already on the worker (a queued call issuing more commands): run inline
+            self._execute(future, fn, args, kwargs)
+            return future
+        
+        with self._lock:
+            self._sequence += 1
+            self._queue.put((
+                _command_priority.get() if priority is None else priority,
+                self._sequence, future, fn, args, kwargs
+            ))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"device-{self.name}", daemon=True)
+                self._thread.start()
+        return future
+    
+    def call(self, fn, *args, **kwargs):
+        """Run ``fn`` on the worker and wait for its result"""
+        return self.submit(fn, *args, **kwargs).result()
+    
+    def pending(self) -> int:
+        return self._queue.qsize()
+    
+    @staticmethod
+    def _execute(future: Future, fn, args, kwargs):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    def _run(self):
+        while True:
+            try:
+                _, _, future, fn, args, kwargs = self._queue.get(timeout=self.idle_timeout)
+            except Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            self._execute(future, fn, args, kwargs)
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome
+
+    A caller that arrives while a call with the same key is in flight waits
+    for it and gets the same result (or exception) instead of running its
+    own. ``forget`` detaches in-flight calls so later callers start afresh.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[object, Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+    
+    def do(self, key, fn, *args, **kwargs) -> Tuple[object, bool]:
+        """Return (result, shared) where ``shared`` is True if another caller ran ``fn``"""
+        with self._lock:
+            future = self._calls.get(key)
+            shared = future is not None
+            if shared:
+                self.coalesced += 1
+            else:
+                future = self._calls[key] = Future()
+                self.executed += 1
+        if shared:
+            return future.result(), True
+        
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+        return future.result(), False
+    
+    def forget(self, predicate):
+        """Stop sharing in-flight calls whose key satisfies ``predicate``"""
+        with self._lock:
+            for key in [key for key in self._calls if predicate(key)]:
+                del self._calls[key]
+
+read_flights = SingleFlight()
+
+def is_read_command(command: str) -> bool:
+    """Whether a CLI command only reads state, so identical concurrent runs can share output"""
+    return command.lstrip().lower().startswith('show ')
+
+class RecordingTransport:
+    """Wraps a netmiko session and records every command and config set
+
+    Entries are buffered per session and appended to ``path`` as one gzip
+    member of JSON lines when ``flush`` is called, so a device's file grows
+    by one member per recorded session. Each entry is a compact array:
+    ``[offset, kind, input, output, elapsed]`` where ``kind`` is
+    ``"command"`` or ``"config"`` and times are in seconds.
+    """
+
+    _write_lock = threading.Lock()
+
+    def __init__(self, connection, path: str, device: str):
+        self.connection = connection
+        self.path = path
+        self.device = device
+        self._started = time.monotonic()
+        self._entries: List[list] = []
+
+    def _record(self, kind: str, payload, func):
+        offset = time.monotonic() - self._started
+        output = func(payload)
+        elapsed = time.monotonic() - self._started - offset
+        self._entries.append([round(offset, 4), kind, payload, output, round(elapsed, 4)])
+        return output
+
+    def send_command(self, command: str) -> str:
+        return self._record('command', command, self.connection.send_command)
+
+    def send_config_set(self, commands: List[str]) -> str:
+        return self._record('config', list(commands), self.connection.send_config_set)
+
+    def flush(self):
+        """Append buffered entries to the recording file"""
+        if not self._entries:
+            return
+        header = {'device': self.device, 'recorded': datetime.now().isoformat()}
+        lines = [json.dumps(header)] + [json.dumps(entry, separators=(',', ':')) for entry in self._entries]
+        with self._write_lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with gzip.open(self.path, 'at', encoding='utf-8') as handle:
+                handle.write('\n'.join(lines) + '\n')
+        self._entries = []
+
+class ReplayTransport:
+    """Serves commands from a recording made by RecordingTransport
+
+    Repeated commands are answered with their recorded outputs in order,
+    cycling back to the first once exhausted. Each answer is delayed by the
+    recorded elapsed time divided by ``speed``; ``speed`` 0 replays without
+    any delay.
+    """
+
+    def __init__(self, entries: List[list], speed: float = 1.0):
+        self.speed = speed
+        self._answers: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+        self._position: Dict[Tuple[str, str], int] = {}
+        for _, kind, payload, output, elapsed in entries:
+            self._answers.setdefault(self._key(kind, payload), []).append((output, elapsed))
+
+    @staticmethod
+    def _key(kind: str, payload) -> Tuple[str, str]:
+        return kind, '\n'.join(payload) if isinstance(payload, list) else payload
+
+    @classmethod
+    def load(cls, path: str, speed: float = 1.0) -> 'ReplayTransport':
+        """Read every session recorded in ``path``"""
+        entries = []
+        with gzip.open(path, 'rt', encoding='utf-8') as handle:
+            for line in handle:
+                record = json.loads(line)
+                if isinstance(record, list):
+                    entries.append(record)
+        return cls(entries, speed)
+
+    def _replay(self, kind: str, payload) -> str:
+        key = self._key(kind, payload)
+        answers = self._answers.get(key)
+        if not answers:
+            raise ValueError(f"No recorded output for {kind} '{key[1]}'")
+        position = self._position.get(key, 0)
+        self._position[key] = (position + 1) % len(answers)
+        output, elapsed = answers[position]
+        if self.speed > 0 and elapsed > 0:
+            time.sleep(elapsed / self.speed)
+        return output
+
+    def send_command(self, command: str) -> str:
+        return self._replay('command', command)
+
+    def send_config_set(self, commands: List[str]) -> str:
+        return self._replay('config', list(commands))
+
+INTERFACE_ARGUMENT_RE = re.compile(r'\binterface\s+\S.*$')
+# "Model number : WS-C2960-24TT-L", or the "cisco WS-C2960-24TT-L (PowerPC405) processor" line
+MODEL_NUMBER_RE = re.compile(r'^(?:Model [Nn]umber\s*:\s*|cisco\s+)(WS-\S+)', re.MULTILINE)
+
+def command_label(command: str) -> str:
+    """Metric label for a command, with interface arguments elided to bound cardinality"""
+    return INTERFACE_ARGUMENT_RE.sub('interface <name>', command)
+
+def recording_path(directory: str, ip: str, port: int) -> str:
+    """Recording file for one device inside a record/replay directory"""
+    return os.path.join(directory, f"{ip}_{port}.jsonl.gz")
 
 class CiscoSwitch:
-    """Real Cisco switch connection handler"""
+    """Real Cisco switch connection handler
+
+    All channel I/O goes through the session's DeviceWorker, so concurrent
+    requests never interleave on the netmiko connection.
+    """
     
     def __init__(self, ip: str, username: str, password: str, port: int = 22):
         self.ip = ip
@@ -173,26 +2076,38 @@ class CiscoSwitch:
         self.password = password
         self.port = port
         self.connection = None
+        self.transport = None
         self.connected = False
+        self.model: Optional[str] = None
+        self.worker = DeviceWorker(f"{ip}:{port}", config.device_worker_idle)
+        self.limiter = rate_limiters.get(self.worker.name)
         
     def connect(self) -> bool:
-        """Connect to real Cisco switch via SSH"""
+        """Connect to real Cisco switch via SSH, reusing a pooled session when possible
+
+        With SESSION_REPLAY_DIR set, commands are answered from the device's
+        recording instead and no SSH session is opened.
+        """
         try:
-            from netmiko import ConnectHandler
-            
-            device = {
-                'device_type': 'cisco_ios',
-                'ip': self.ip,
-                'username': self.username,
-                'password': self.password,
-                'port': self.port,
-                'timeout': config.connection_timeout
-            }
+            if config.session_replay_dir:
+                self.transport = ReplayTransport.load(
+                    recording_path(config.session_replay_dir, self.ip, self.port), config.session_replay_speed)
+                self._select_limiter()
+                self.connected = True
+                return True
             
-            self.connection = ConnectHandler(**device)
+            self.connection = connection_pool.acquire(self.ip, self.username, self.password, self.port)
+            self.transport = self.connection
+            if config.session_record_dir:
+                self.transport = RecordingTransport(
+                    self.connection, recording_path(config.session_record_dir, self.ip, self.port),
+                    f"{self.ip}:{self.port}")
+            self._select_limiter()
             self.connected = True
             return True
             
+        except SessionsBusy:
+            raise
         except ImportError:
             logger.error("netmiko library not installed. Install with: pip install netmiko")
             return False
@@ -200,45 +2115,113 @@ class CiscoSwitch:
             logger.error(f"Failed to connect to switch: {str(e)}")
             return False
     
+    def _select_limiter(self):
+        """Read the switch model once when a rate limit profile depends on it"""
+        if not rate_limiters.needs_model:
+            return
+        if rate_limiters.knows_model(self.worker.name):
+            self.model = rate_limiters.model(self.worker.name)
+            return
+        try:
+            output = self.worker.call(self._send_command, 'show version')
+        except Exception as e:
+            logger.warning(f"Could not read the model of {self.ip}, using the default rate limit: {str(e)}")
+            return
+        match = MODEL_NUMBER_RE.search(output)
+        self.model = match.group(1) if match else None
+        rate_limiters.set_model(self.worker.name, self.model)
+    
     def disconnect(self):
-        """Disconnect from switch"""
+        """Return the session to the pool once queued commands have run"""
+        if self.transport:
+            self.worker.call(self._release)
+    
+    def _release(self):
+        if isinstance(self.transport, RecordingTransport):
+            try:
+                self.transport.flush()
+            except OSError as e:
+                logger.error(f"Failed to save session recording: {str(e)}")
         if self.connection:
-            self.connection.disconnect()
+            connection_pool.release(self.ip, self.username, self.password, self.port, self.connection)
             self.connection = None
-            self.connected = False
+        self.transport = None
+        self.connected = False
     
-    def execute_command(self, command: str) -> str:
-        """Execute command on switch"""
-        if not self.connection:
+    def submit_command(self, command: str, priority: Optional[int] = None) -> Future:
+        """Queue a command on the session and return a Future for its output"""
+        return self.worker.submit(self._send_command, command, priority=priority)
+    
+    def _send_command(self, command: str) -> str:
+        if not self.transport:
             raise ConnectionError("Not connected to switch")
-        
+        self.limiter.throttle()
+        with command_seconds.time('execute_command', command_label(command)):
+            return self.transport.send_command(command)
+    
+    def execute_command(self, command: str) -> str:
+        """Execute command on switch
+
+        Identical show commands issued concurrently against the same session
+        share one round trip. Any other command ends that sharing, so reads
+        issued after a change never reuse output from before it.
+        """
         try:
-            output = self.connection.send_command(command)
-            return output
+            with trace_span('command', switch=self.ip, command=command) as span:
+                if not is_read_command(command):
+                    self._forget_reads()
+                    return self.submit_command(command).result()
+                if threading.current_thread() is self.worker._thread:
+                    # Waiting on a flight queued behind the running call would deadlock
+                    return self.submit_command(command).result()
+                output, shared = read_flights.do((self.worker.name, command),
+                                                 lambda: self.submit_command(command).result())
+                if span:
+                    span.attributes['coalesced'] = shared
+                return output
         except Exception as e:
             logger.error(f"Command execution failed: {str(e)}")
             raise
     
+    def send_config_set(self, commands: List[str]) -> str:
+        """Send configuration commands in one config session"""
+        self._forget_reads()
+        with trace_span('config', switch=self.ip, commands=len(commands)):
+            return self.worker.call(self._send_config_set, commands)
+    
+    def _forget_reads(self):
+        read_flights.forget(lambda key: key[0] == self.worker.name)
+    
+    def _send_config_set(self, commands: List[str]) -> str:
+        if not self.transport:
+            raise ConnectionError("Not connected to switch")
+        self.limiter.throttle()
+        with command_seconds.time('send_config_set', 'config'):
+            return self.transport.send_config_set(commands)
+    
     def get_interface_status(self, interface: str) -> Dict:
         """Get port security status for an interface"""
         try:
-            command = f"show port-security interface {interface}"
-            output = self.execute_command(command)
-            
-            # Parse the output (simplified parsing - would need more robust parsing in production)
-            status = {
-                'port_security': 'enabled' in output.lower(),
-                'max_mac_addresses': 1,  # Default, would parse from output
-                'violation_action': 'shutdown',  # Default, would parse from output
-                'learned_mac_addresses': [],  # Would parse from output
-                'status': 'up' if 'up' in output.lower() else 'down'
-            }
-            
-            return status
+            statuses = self.get_all_interface_status()
+            interface_name = expand_interface_name(interface)
+            if interface_name not in statuses:
+                raise ValueError(f"Interface {interface} not found")
+            return statuses[interface_name]
         except Exception as e:
             logger.error(f"Failed to get interface status: {str(e)}")
             raise
     
+    def get_all_interface_status(self) -> Dict[str, Dict]:
+        """Get port security status for every interface with a fixed number of commands"""
+        try:
+            states = parse_interfaces_status(self.execute_command("show interfaces status"))
+            ports = parse_port_security(self.execute_command("show port-security"))
+            addresses = parse_port_security_addresses(self.execute_command("show port-security address"))
+            return build_port_security_status(states, ports, addresses)
+        except Exception as e:
+            logger.error(f"Failed to get port security status: {str(e)}")
+            raise
+    
     def enable_port_security(self, interface: str, max_mac: int = 1, violation_action: str = 'shutdown') -> str:
         """Enable port security on an interface"""
         try:
@@ -250,7 +2233,7 @@ class CiscoSwitch:
                 "exit"
             ]
             
-            config_commands = self.connection.send_config_set(commands)
+            config_commands = self.send_config_set(commands)
             return f"Port security enabled on {interface}"
         except Exception as e:
             logger.error(f"Failed to enable port security: {str(e)}")
@@ -265,7 +2248,7 @@ class CiscoSwitch:
                 "exit"
             ]
             
-            config_commands = self.connection.send_config_set(commands)
+            config_commands = self.send_config_set(commands)
             return f"Port security disabled on {interface}"
         except Exception as e:
             logger.error(f"Failed to disable port security: {str(e)}")
@@ -281,19 +2264,23 @@ class CiscoSwitch:
             logger.error(f"Failed to clear port security: {str(e)}")
             raise
     
+    def configure_port_security_batch(self, changes: List[Dict]) -> str:
+        """Apply many enable/disable changes in a single config session using interface ranges"""
+        try:
+            commands = build_port_security_batch(changes)
+            config_commands = self.send_config_set(commands)
+            return f"Port security updated on {len(changes)} interfaces"
+        except Exception as e:
+            logger.error(f"Failed to apply port security batch: {str(e)}")
+            raise
+    
     def get_all_interfaces(self) -> List[str]:
         """Get list of all interfaces from real switch"""
         try:
             command = "show interfaces status"
             output = self.execute_command(command)
             
-            # Parse interface names from output
-            interfaces = []
-            lines = output.split('\n')
-            for line in lines:
-                if 'GigabitEthernet' in line or 'FastEthernet' in line:
-                    interface_name = line.split()[0]
-                    interfaces.append(interface_name)
+            interfaces = list(parse_interfaces_status(output))
             
             return interfaces if interfaces else ['GigabitEthernet0/1', 'GigabitEthernet0/2', 'GigabitEthernet0/3']
         except Exception as e:
@@ -301,14 +2288,310 @@ class CiscoSwitch:
             # Return default interfaces on error
             return ['GigabitEthernet0/1', 'GigabitEthernet0/2', 'GigabitEthernet0/3']
 
+PORT_SECURITY_ACTIONS = ('enable', 'disable', 'clear', 'status')
+
+class EventBus:
+    """Bounded history of published events that subscribers can block on
+
+    Each event gets an increasing ID, used as the SSE event ID so clients can
+    resume with Last-Event-ID.
+    """
+    
+    def __init__(self, capacity: int):
+        self._events = deque(maxlen=max(1, capacity))
+        self._last_id = 0
+        self._cond = threading.Condition()
+    
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+    
+    def publish(self, event_type: str, data: Dict) -> int:
+        with self._cond:
+            self._last_id += 1
+            self._events.append((self._last_id, event_type, data))
+            self._cond.notify_all()
+            return self._last_id
+    
+    def wait(self, after: int, timeout: float) -> Tuple[List[Tuple[int, str, Dict]], bool]:
+        """Wait for events newer than ``after``
+
+        Returns the events and whether the subscriber has missed events:
+        either some were already dropped from the history, or ``after`` is
+        ahead of this bus (a restart, or another worker process). In both
+        cases the whole retained history is returned without waiting.
+        """
+        with self._cond:
+            ahead = after > self._last_id
+            if ahead:
+                after = 0
+            else:
+                self._cond.wait_for(lambda: self._last_id > after, timeout)
+            if not self._events:
+                return [], ahead
+            first_id = self._events[0][0]
+            start = max(0, after - first_id + 1)
+            return list(islice(self._events, start, None)), ahead or after + 1 < first_id
+
+event_bus = EventBus(config.event_capacity)
+
+class LogBuffer:
+    """Fixed-capacity ring buffer of log entries with increasing sequence numbers
+
+    Appends are O(1) and never copy the buffer. Sequence numbers keep counting
+    across ``clear`` so client cursors stay valid.
+    """
+    
+    def __init__(self, capacity: int):
+        self._entries = deque(maxlen=max(1, capacity))
+        self._last_seq = 0
+        self.reset_seq = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+    
+    def append(self, entry: Dict) -> Dict:
+        """Store an entry, stamping it with the next sequence number"""
+        with self._lock:
+            self._last_seq += 1
+            entry['seq'] = self._last_seq
+            self._entries.append(entry)
+        return entry
+    
+    def since(self, after: int, limit: Optional[int] = None) -> List[Dict]:
+        """Return entries with a sequence number greater than ``after``"""
+        with self._lock:
+            if not self._entries:
+                return []
+            start = max(0, after - self._entries[0]['seq'] + 1)
+            stop = start + limit if limit else None
+            return list(islice(self._entries, start, stop))
+    
+    def tail(self, count: int) -> List[Dict]:
+        """Return the newest ``count`` entries"""
+        with self._lock:
+            return list(islice(self._entries, max(0, len(self._entries) - count), None))
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.reset_seq = self._last_seq
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SharedLogBuffer:
+    """LogBuffer with the same interface, stored in a shared state store
+
+    Sequence numbers come from the table's AUTOINCREMENT key, so they are
+    unique and increasing across worker processes. Entries beyond
+    ``capacity`` are trimmed every hundred appends.
+    """
+    
+    def __init__(self, store: 'SQLiteStateStore', capacity: int):
+        self.store = store
+        self.capacity = max(1, capacity)
+    
+    @property
+    def last_seq(self) -> int:
+        row = self.store._db().execute("SELECT seq FROM sqlite_sequence WHERE name = 'logs'").fetchone()
+        return row[0] if row else 0
+    
+    @property
+    def reset_seq(self) -> int:
+        return self.store.get('settings', 'log_reset_seq', 0)
+    
+    def append(self, entry: Dict) -> Dict:
+        """Store an entry, stamping it with the next sequence number"""
+        with self.store._db() as connection:
+            seq = connection.execute('INSERT INTO logs (entry) VALUES (?)', (json.dumps(entry),)).lastrowid
+            if seq % 100 == 0:
+                connection.execute('DELETE FROM logs WHERE seq <= ?', (seq - self.capacity,))
+        entry['seq'] = seq
+        return entry
+    
+    def _entries(self, rows) -> List[Dict]:
+        return [dict(json.loads(entry), seq=seq) for seq, entry in rows]
+    
+    def since(self, after: int, limit: Optional[int] = None) -> List[Dict]:
+        """Return entries with a sequence number greater than ``after``"""
+        return self._entries(self.store._db().execute(
+            'SELECT seq, entry FROM logs WHERE seq > ? ORDER BY seq LIMIT ?', (after, limit or -1)).fetchall())
+    
+    def tail(self, count: int) -> List[Dict]:
+        """Return the newest ``count`` entries"""
+        rows = self.store._db().execute('SELECT seq, entry FROM logs ORDER BY seq DESC LIMIT ?', (count,)).fetchall()
+        return self._entries(reversed(rows))
+    
+    def clear(self):
+        with self.store._db() as connection:
+            connection.execute('DELETE FROM logs')
+        self.store.set('settings', 'log_reset_seq', self.last_seq)
+    
+    def __len__(self) -> int:
+        return self.store._db().execute('SELECT COUNT(*) FROM logs').fetchone()[0]
+
+# Operator on whose behalf the current request (and the jobs it starts) acts
+_audit_user = contextvars.ContextVar('audit_user', default=None)
+
+class AuditStore:
+    """Append-only SQLite audit trail of port security actions
+
+    ``record`` only queues the row; a writer thread inserts queued rows in
+    batches of up to ``batch_size`` per transaction, at least every
+    ``flush_interval`` seconds. The database runs in WAL mode so queries
+    never wait for the writer. Queries page by keyset on the row ID
+    (newest first), which stays fast however many rows there are.
+    """
+    
+    COLUMNS = ('id', 'ts', 'device', 'interface', 'action', 'parameters', 'success', 'result', 'duration',
+               'user', 'trace_id')
+    
+    def __init__(self, path: str, batch_size: int, flush_interval: float):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending: Queue = Queue()
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._initialize()
+        self._writer = threading.Thread(target=self._write_loop, name='audit-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+    
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+    
+    def _initialize(self):
+        connection = self._connect()
+        with connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS audit (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    device TEXT,
+                    interface TEXT,
+                    action TEXT NOT NULL,
+                    parameters TEXT,
+                    success INTEGER NOT NULL,
+                    result TEXT,
+                    duration REAL,
+                    user TEXT,
+                    trace_id TEXT
+                )""")
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_audit_device_interface ON audit (device, interface, id)')
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit (ts)')
+        connection.close()
+    
+    def record(self, device: Optional[str], interface: Optional[str], action: str, parameters: Dict,
+               success: bool, result: str, duration: float):
+        """Queue one action for writing, stamped with the current user and trace"""
+        self._pending.put((time.time(), device, expand_interface_name(interface) if interface else None, action,
+                           json.dumps(parameters, sort_keys=True), int(success), result, round(duration, 6),
+                           _audit_user.get(), current_trace_id()))
+    
+    def _write_loop(self):
+        connection = self._connect()
+        while not (self._stop.is_set() and self._pending.empty()):
+            try:
+                batch = [self._pending.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except Empty:
+                    break
+            try:
+                with connection:
+                    connection.executemany(
+                        'INSERT INTO audit (ts, device, interface, action, parameters, success, result, duration, '
+                        'user, trace_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write {len(batch)} audit rows: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+        connection.close()
+    
+    def flush(self):
+        """Block until every queued row has been written"""
+        self._pending.join()
+    
+    def close(self):
+        self._stop.set()
+        self._writer.join(timeout=max(5.0, self.flush_interval * 2))
+    
+    def query(self, device: Optional[str] = None, interface: Optional[str] = None, action: Optional[str] = None,
+              user: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              before: Optional[int] = None, limit: int = 100) -> Tuple[List[Dict], Optional[int]]:
+        """Return up to ``limit`` rows older than row ID ``before``, newest first, and the next cursor"""
+        clauses, params = [], []
+        for column, value in (('device', device), ('action', action), ('user', user)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if interface:
+            clauses.append('interface = ?')
+            params.append(expand_interface_name(interface))
+        if since is not None:
+            clauses.append('ts >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('ts < ?')
+            params.append(until)
+        if before is not None:
+            clauses.append('id < ?')
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        rows = connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM audit {where} ORDER BY id DESC LIMIT ?",
+                                  params + [limit + 1]).fetchall()
+        
+        entries = []
+        for row in rows[:limit]:
+            entry = dict(zip(self.COLUMNS, row))
+            entry['parameters'] = json.loads(entry['parameters']) if entry['parameters'] else {}
+            entry['success'] = bool(entry['success'])
+            entry['timestamp'] = datetime.fromtimestamp(entry['ts']).isoformat()
+            entries.append(entry)
+        next_cursor = entries[-1]['id'] if len(rows) > limit else None
+        return entries, next_cursor
+
+audit_store = AuditStore(config.audit_db, config.audit_batch_size, config.audit_flush_interval)
+
 class SwitchManager:
-    """Manager class to handle both mock and real switch operations"""
+    """Manager class to handle both mock and real switch operations
+
+    Holds a registry of concurrent switch sessions keyed by device ID (the
+    switch IP unless the caller names it otherwise). Calls that omit the
+    device act on the most recently connected one.
+
+    The registry (credentials, mode and default device) lives in the state
+    store; the live session objects are per process. With a shared store a
+    worker opens its own session to a device another worker registered the
+    first time it needs one, and drops sessions to devices that were
+    disconnected elsewhere. Request threads only read the caches; anything
+    that needs a session runs in a job.
+    """
     
     def __init__(self):
-        self.switch = None
-        self.connected = False
-        self.logs = []
-        self.current_credentials = None
+        self.sessions: Dict[str, object] = {}
+        # device -> registration token the local session was opened for
+        self._session_tokens: Dict[str, str] = {}
+        self.logs = state_store.log_buffer(config.log_capacity)
+        self.interface_cache = state_store.cache(config.interface_cache_ttl, 'interfaces')
+        # (device, interface) -> status record; (device, None) -> interface names of the last full read
+        self.status_cache = state_store.cache(config.status_cache_ttl, 'status')
+        self._lock = threading.RLock()
     
     def add_log(self, message: str, level: str = "INFO"):
         """Add log entry"""
@@ -316,99 +2599,917 @@ class SwitchManager:
         log_entry = {
             "timestamp": timestamp,
             "level": level,
-            "message": message
+            "message": message,
+            "trace_id": current_trace_id()
         }
         self.logs.append(log_entry)
         logger.info(f"[{level}] {message}")
+        event_bus.publish('log', log_entry)
+    
+    @property
+    def default_device(self) -> Optional[str]:
+        return state_store.get('settings', 'default_device')
+    
+    @default_device.setter
+    def default_device(self, device: Optional[str]):
+        state_store.set('settings', 'default_device', device)
+    
+    def resolve_device(self, device: Optional[str] = None) -> Optional[str]:
+        """Return the device ID to act on, defaulting to the last connected device"""
+        return device or self.default_device
+    
+    def get_switch(self, device: Optional[str] = None):
+        """Return the connected switch session for a device, or None if it is not registered
+
+        A device registered by another worker gets a session in this process
+        too, opened here on first use, so call this from a job.
+        """
+        device_id = self.resolve_device(device)
+        if device_id is None:
+            return None
+        registration = state_store.get('devices', device_id)
+        with self._lock:
+            switch = self.sessions.get(device_id)
+            current = registration is not None and self._session_tokens.get(device_id) == registration['token']
+            if switch and current:
+                return switch
+            stale = self.sessions.pop(device_id, None)
+            self._session_tokens.pop(device_id, None)
+        if stale:
+            stale.disconnect()
+        if registration is None:
+            return None
+        
+        # Registered by another worker (or reconnected there): open this process's own session
+        credentials = self._credentials(registration)
+        switch, message = self.open_switch(credentials['ip'], credentials['username'], credentials['password'],
+                                           mock=registration['mock'])
+        if not switch:
+            logger.error(f"Could not open a session to registered switch {device_id}: {message}")
+            return None
+        with self._lock:
+            if device_id in self.sessions:
+                switch, extra = self.sessions[device_id], switch
+            else:
+                self.sessions[device_id] = switch
+                self._session_tokens[device_id] = registration['token']
+                extra = None
+        if extra:
+            extra.disconnect()
+        return switch
+    
+    @staticmethod
+    def _close_session_payload(device_id: str, switch) -> Dict:
+        switch.disconnect()
+        return {'device': device_id, 'connected': False}
+    
+    def is_registered(self, device: Optional[str] = None) -> bool:
+        """Whether a device is in the shared registry, without touching any session"""
+        device_id = self.resolve_device(device)
+        return device_id is not None and state_store.get('devices', device_id) is not None
+    
+    def is_connected(self, device: Optional[str] = None) -> bool:
+        """Check whether a device has a live session"""
+        switch = self.get_switch(device)
+        return bool(switch and switch.connected)
+    
+    @property
+    def switch(self):
+        """Session of the default device (single-switch compatibility)"""
+        return self.get_switch()
+    
+    @property
+    def connected(self) -> bool:
+        """Whether the default device is connected (single-switch compatibility)"""
+        return self.is_connected()
+    
+    @property
+    def current_credentials(self) -> Optional[Dict]:
+        """Credentials of the default device (single-switch compatibility)"""
+        registration = state_store.get('devices', self.default_device) if self.default_device else None
+        if registration is None:
+            return None
+        return self._credentials(registration)
+    
+    def list_devices(self) -> List[Dict]:
+        """Describe every registered device
+
+        ``registered`` is the shared registry entry; ``connected`` is whether
+        this process holds a live session to it, which under several workers
+        may not be open yet (it is opened on first use).
+        """
+        default = self.default_device
+        with self._lock:
+            sessions = dict(self.sessions)
+        devices = []
+        for device, registration in state_store.items('devices').items():
+            session = sessions.get(device)
+            entry = {
+                'device': device,
+                'ip': registration['ip'],
+                'username': registration['username'],
+                'mock': registration['mock'],
+                'registered': True,
+                'connected': bool(session and session.connected),
+                'default': device == default
+            }
+            if isinstance(session, MockCiscoSwitch):
+                entry['simulated_time'] = round(session.simulated_time, 3)
+            devices.append(entry)
+        return devices
+    
+    @staticmethod
+    def _credentials(registration: Dict) -> Dict:
+        """IP, username and (unsealed) password of a registry entry"""
+        return {
+            'ip': registration['ip'],
+            'username': registration['username'],
+            'password': state_store.unseal(registration['password'])
+        }
+    
+    def _register(self, device_id: str, switch, credentials: Dict, mock: bool) -> Dict:
+        registration = dict(credentials, password=state_store.seal(credentials['password']),
+                            mock=mock, token=uuid.uuid4().hex)
+        with self._lock:
+            self.sessions[device_id] = switch
+            self._session_tokens[device_id] = registration['token']
+        return registration
+    
+    def create_switch(self, ip: str, username: str, password: str, mock: Optional[bool] = None):
+        """Build an unconnected switch object for the current (or given) mode"""
+        if config.mock_mode if mock is None else mock:
+            return mock_fleet.create_switch(ip)
+        return CiscoSwitch(ip, username, password, config.ssh_port)
+    
+    def open_switch(self, ip: str, username: str, password: str,
+                    mock: Optional[bool] = None) -> Tuple[Optional[object], str]:
+        """Build and connect a switch object, guarded by the switch's circuit breaker"""
+        breaker = circuit_breakers.get(ip)
+        allowed, retry_after = breaker.allow()
+        if not allowed:
+            return None, f"Switch {ip} is unreachable (circuit open, retry in {retry_after:.0f}s)"
         
-        # Keep only last 100 logs
-        if len(self.logs) > 100:
-            self.logs = self.logs[-100:]
+        mock = config.mock_mode if mock is None else mock
+        switch = self.create_switch(ip, username, password, mock=mock)
+        started = time.perf_counter()
+        with trace_span('connect', switch=ip) as span:
+            try:
+                connected = switch.connect()
+            except SessionsBusy as e:
+                # The switch was never contacted, so this is no evidence against it
+                breaker.release_probe()
+                connect_seconds.observe(time.perf_counter() - started, 'mock' if mock else 'real', 'busy')
+                return None, str(e)
+            if span:
+                span.attributes['connected'] = connected
+        connect_seconds.observe(time.perf_counter() - started, 'mock' if mock else 'real',
+                                'success' if connected else 'failure')
+        if connected:
+            breaker.record_success()
+            return switch, "Connected successfully"
+        breaker.record_failure()
+        return None, "Connection failed"
     
-    def connect(self, ip: str = None, username: str = None, password: str = None) -> Tuple[bool, str]:
-        """Connect to switch (mock or real)"""
+    def connect(self, ip: str = None, username: str = None, password: str = None,
+                device: Optional[str] = None) -> Tuple[bool, str]:
+        """Connect to switch (mock or real) and register the session"""
         try:
             # Use provided credentials or fall back to config
             switch_ip = ip or config.switch_ip
             switch_username = username or config.switch_username
             switch_password = password or config.switch_password
+            device_id = device or switch_ip
+            mock = config.mock_mode
+            credentials = {
+                'ip': switch_ip,
+                'username': switch_username,
+                'password': switch_password
+            }
+            
+            registration = state_store.get('devices', device_id)
+            if registration is not None:
+                if (registration['mock'] == mock
+                        and self._credentials(registration) == credentials
+                        and self.is_connected(device_id)):
+                    self.default_device = device_id
+                    return True, "Already connected"
+                self.disconnect(device_id)
             
-            if config.mock_mode:
-                self.switch = MockCiscoSwitch()
-                self.add_log("Using mock mode for testing")
+            if mock:
+                self.add_log(f"Using mock mode for testing ({device_id})")
             else:
-                self.switch = CiscoSwitch(
-                    switch_ip,
-                    switch_username,
-                    switch_password,
-                    config.ssh_port
-                )
                 self.add_log(f"Connecting to real switch at {switch_ip}")
             
-            if self.switch.connect():
-                self.connected = True
-                self.current_credentials = {
-                    'ip': switch_ip,
-                    'username': switch_username,
-                    'password': switch_password
-                }
-                self.add_log("Successfully connected to switch")
+            switch, message = self.open_switch(switch_ip, switch_username, switch_password, mock=mock)
+            if switch:
+                state_store.set('devices', device_id, self._register(device_id, switch, credentials, mock))
+                self.default_device = device_id
+                self.invalidate_device_cache(device_id)
+                self.add_log(f"Successfully connected to switch {device_id}")
                 return True, "Connected successfully"
             else:
-                self.add_log("Failed to connect to switch", "ERROR")
-                return False, "Connection failed"
+                self.add_log(f"Failed to connect to switch {device_id}: {message}", "ERROR")
+                return False, message
                 
         except Exception as e:
             error_msg = f"Connection error: {str(e)}"
             self.add_log(error_msg, "ERROR")
             return False, error_msg
     
-    def disconnect(self):
-        """Disconnect from switch"""
-        if self.switch:
-            self.switch.disconnect()
-            self.connected = False
-            self.current_credentials = None
-            self.add_log("Disconnected from switch")
-    
-    def execute_port_security_action(self, interface: str, action: str, **kwargs) -> Tuple[bool, str]:
-        """Execute port security action"""
-        if not self.connected:
+    def connect_mock_fleet(self, count: int, start: str = '10.0.0.1') -> List[str]:
+        """Register ``count`` connected mock switches on consecutive IPs
+
+        Existing registrations for those IPs are kept; the default device is
+        left unchanged unless none was set.
+        """
+        credentials = {'username': config.switch_username, 'password': config.switch_password}
+        registered = state_store.items('devices')
+        registrations = {}
+        for ip in mock_fleet.addresses(count, start):
+            if ip in registered:
+                continue
+            switch = mock_fleet.create_switch(ip)
+            switch.connect()
+            registrations[ip] = self._register(ip, switch, dict(credentials, ip=ip), True)
+        state_store.set_many('devices', registrations)
+        if registrations and self.default_device is None:
+            self.default_device = next(iter(registrations))
+        self.add_log(f"Registered {len(registrations)} mock switches starting at {start}")
+        return list(registrations)
+    
+    def disconnect(self, device: Optional[str] = None, wait: bool = True):
+        """Disconnect from switch and drop it from the registry
+
+        With ``wait=False`` the session is closed by a background job, since
+        that waits for its queued commands.
+        """
+        device_id = self.resolve_device(device)
+        registered = state_store.get('devices', device_id) is not None
+        state_store.delete('devices', device_id)
+        with self._lock:
+            switch = self.sessions.pop(device_id, None)
+            self._session_tokens.pop(device_id, None)
+        if device_id == self.default_device:
+            self.default_device = next(reversed(state_store.items('devices')), None)
+        self.invalidate_device_cache(device_id)
+        if switch and wait:
+            switch.disconnect()
+        elif switch:
+            job_manager.submit('close-session', self._close_session_payload, device_id, switch, device=device_id)
+        if switch or registered:
+            self.add_log(f"Disconnected from switch {device_id}")
+    
+    def disconnect_all(self, wait: bool = True):
+        """Disconnect every registered session"""
+        with self._lock:
+            devices = set(self.sessions)
+        for device_id in devices | set(state_store.items('devices')):
+            self.disconnect(device_id, wait=wait)
+    
+    def execute_port_security_action(self, interface: str, action: str, device: Optional[str] = None,
+                                     **kwargs) -> Tuple[bool, str, Optional[float]]:
+        """Execute port security action
+
+        Returns (success, result text, age in seconds of the status read for
+        ``status``, otherwise None).
+        """
+        device_id = self.resolve_device(device)
+        switch = self.get_switch(device)
+        if not switch or not switch.connected:
+            audit_store.record(device_id, interface, action, kwargs, False, "Not connected to switch", 0.0)
+            return False, "Not connected to switch", None
+        
+        if action not in PORT_SECURITY_ACTIONS:
+            audit_store.record(device_id, interface, str(action), kwargs, False, f"Unknown action: {action}", 0.0)
+            return False, f"Unknown action: {action}", None
+        
+        started = time.monotonic()
+        age = None
+        try:
+            success = True
+            result, age = self.perform_action(switch, interface, action, device=device_id, **kwargs)
+        except Exception as e:
+            success, result = False, f"Action failed: {str(e)}"
+            self.add_log(result, "ERROR")
+        audit_store.record(device_id, interface, action, kwargs, success, result, time.monotonic() - started)
+        
+        event_bus.publish('action', {
+            'device': device_id,
+            'interface': interface,
+            'action': action,
+            'success': success,
+            'result': result
+        })
+        return success, result, age
+    
+    def invalidate_device_cache(self, device: str):
+        """Forget everything cached about a device"""
+        self.interface_cache.invalidate(device)
+        self.status_cache.invalidate_group(device)
+    
+    def get_port_security_status(self, switch, device: Optional[str], interface: str,
+                                 refresh: bool = False) -> Tuple[Dict, float]:
+        """Return an interface's port security status and its age in seconds
+
+        Served from the status cache when fresh. On a miss the whole table is
+        read when the switch supports it, which warms every other interface.
+        """
+        key = (device, expand_interface_name(interface))
+        if device and not refresh:
+            cached = self.status_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        if device and hasattr(switch, 'get_all_interface_status'):
+            statuses = self.get_all_port_security_status(switch, device, refresh=True)
+            if key[1] in statuses:
+                return statuses[key[1]]
+        
+        status = dict(switch.get_interface_status(interface))
+        if device:
+            self.status_cache.set(key, status)
+        return status, 0.0
+    
+    def get_all_port_security_status(self, switch, device: str, refresh: bool = False,
+                                     cached_only: bool = False) -> Optional[Dict[str, Tuple[Dict, float]]]:
+        """Return {interface: (status, age)} for every interface on a device
+
+        ``switch`` may be None to look the session up on a cache miss. With
+        ``cached_only`` a miss returns None instead of reading the switch.
+        """
+        if not refresh:
+            names = self.status_cache.get((device, None))
+            if names is not None:
+                entries = {name: self.status_cache.get((device, name)) for name in names[0]}
+                if all(entry is not None for entry in entries.values()):
+                    return entries
+        
+        if cached_only:
+            return None
+        if switch is None:
+            switch = self.get_switch(device)
+            if not switch or not switch.connected:
+                raise ConnectionError("Not connected to switch")
+        statuses = switch.get_all_interface_status()
+        for name, status in statuses.items():
+            self.status_cache.set((device, name), status)
+        self.status_cache.set((device, None), list(statuses))
+        return {name: (status, 0.0) for name, status in statuses.items()}
+    
+    def _update_cached_status(self, device: Optional[str], interface: str, **changes):
+        """Apply a change the app just made to a cached status record, if there is one"""
+        if not device:
+            return
+        key = (device, expand_interface_name(interface))
+        cached = self.status_cache.get(key)
+        if cached is not None:
+            self.status_cache.set(key, dict(cached[0], **changes))
+    
+    def get_interfaces(self, device: Optional[str] = None, refresh: bool = False,
+                       cached_only: bool = False) -> Optional[Tuple[List[str], Optional[float]]]:
+        """Return a device's interface list and the age of the cached copy (None if just fetched)
+
+        Cache hits need no session. With ``cached_only`` a miss returns None
+        instead of reading the switch.
+        """
+        device_id = self.resolve_device(device)
+        if not self.is_registered(device_id):
+            raise ConnectionError("Not connected to switch")
+        
+        if not refresh:
+            cached = self.interface_cache.get(device_id)
+            if cached is not None:
+                return cached[0], cached[1]
+        if cached_only:
+            return None
+        
+        switch = self.get_switch(device_id)
+        if not switch or not switch.connected:
+            raise ConnectionError("Not connected to switch")
+        
+        if hasattr(switch, 'get_all_interfaces'):
+            interfaces = switch.get_all_interfaces()
+        else:
+            # Default interfaces for real switch
+            interfaces = ['GigabitEthernet0/1', 'GigabitEthernet0/2', 'GigabitEthernet0/3']
+        self.interface_cache.set(device_id, interfaces)
+        return interfaces, None
+    
+    def execute_batch_action(self, changes: List[Dict], device: Optional[str] = None) -> Tuple[bool, str]:
+        """Apply enable/disable changes to many interfaces of one switch in a single config session"""
+        device_id = self.resolve_device(device)
+        switch = self.get_switch(device_id)
+        if not switch or not switch.connected:
+            self._audit_batch(device_id, changes, False, "Not connected to switch", 0.0)
             return False, "Not connected to switch"
         
+        started = time.monotonic()
         try:
-            if action == "enable":
-                max_mac = kwargs.get('max_mac', 1)
-                violation_action = kwargs.get('violation_action', 'shutdown')
-                result = self.switch.enable_port_security(interface, max_mac, violation_action)
-                self.add_log(f"Enabled port security on {interface}")
-                
-            elif action == "disable":
-                result = self.switch.disable_port_security(interface)
-                self.add_log(f"Disabled port security on {interface}")
-                
-            elif action == "clear":
-                result = self.switch.clear_port_security(interface)
-                self.add_log(f"Cleared port security on {interface}")
-                
-            elif action == "status":
-                status = self.switch.get_interface_status(interface)
-                result = f"Port security status for {interface}:\n{json.dumps(status, indent=2)}"
-                self.add_log(f"Retrieved status for {interface}")
-                
-            else:
-                return False, f"Unknown action: {action}"
-            
-            return True, result
-            
+            result = switch.configure_port_security_batch(changes)
         except Exception as e:
-            error_msg = f"Action failed: {str(e)}"
+            error_msg = f"Batch action failed: {str(e)}"
             self.add_log(error_msg, "ERROR")
+            self._audit_batch(device_id, changes, False, error_msg, time.monotonic() - started)
+            event_bus.publish('action', {
+                'device': device_id,
+                'interfaces': [change['interface'] for change in changes],
+                'action': 'batch',
+                'success': False,
+                'result': error_msg
+            })
             return False, error_msg
+        
+        self.interface_cache.invalidate(device_id)
+        for change in changes:
+            if change['action'] == 'enable':
+                self._update_cached_status(device_id, change['interface'], port_security=True,
+                                           max_mac_addresses=int(change.get('max_mac', 1)),
+                                           violation_action=change.get('violation_action', 'shutdown'))
+            else:
+                self._update_cached_status(device_id, change['interface'], port_security=False,
+                                           learned_mac_addresses=[])
+        self.add_log(f"Updated port security on {len(changes)} interfaces of {device_id}")
+        self._audit_batch(device_id, changes, True, result, time.monotonic() - started)
+        event_bus.publish('action', {
+            'device': device_id,
+            'interfaces': [change['interface'] for change in changes],
+            'action': 'batch',
+            'success': True,
+            'result': result
+        })
+        return True, result
+    
+    @staticmethod
+    def _audit_batch(device: str, changes: List[Dict], success: bool, result: str, duration: float):
+        """Audit one row per interface of a batch, sharing the batch's outcome and duration"""
+        for change in changes:
+            parameters = {key: value for key, value in change.items() if key not in ('interface', 'action')}
+            audit_store.record(device, change['interface'], change['action'], dict(parameters, batch=True),
+                               success, result, duration)
+    
+    def perform_action(self, switch, interface: str, action: str, device: Optional[str] = None,
+                       **kwargs) -> Tuple[str, Optional[float]]:
+        """Run one port security action on a switch session
+
+        Returns the result text and, for ``status``, the age of the status it reports.
+        """
+        kwargs = validate_port_security_args(interface, action, **kwargs)
+        if action in ('enable', 'disable', 'clear') and device:
+            self.interface_cache.invalidate(device)
+        
+        age = None
+        if action == "enable":
+            max_mac = int(kwargs.get('max_mac', 1))
+            violation_action = kwargs.get('violation_action', 'shutdown')
+            result = switch.enable_port_security(interface, max_mac, violation_action)
+            self._update_cached_status(device, interface, port_security=True,
+                                       max_mac_addresses=max_mac, violation_action=violation_action)
+            self.add_log(f"Enabled port security on {interface}")
+            
+        elif action == "disable":
+            result = switch.disable_port_security(interface)
+            self._update_cached_status(device, interface, port_security=False, learned_mac_addresses=[])
+            self.add_log(f"Disabled port security on {interface}")
+            
+        elif action == "clear":
+            result = switch.clear_port_security(interface)
+            # What clearing does to the port depends on the device, so re-read it next time
+            if device:
+                self.status_cache.invalidate((device, expand_interface_name(interface)))
+            self.add_log(f"Cleared port security on {interface}")
+            
+        elif action == "status":
+            status, age = self.get_port_security_status(switch, device, interface)
+            result = f"Port security status for {interface}:\n{json.dumps(status, indent=2)}"
+            self.add_log(f"Retrieved status for {interface}")
+            
+        else:
+            raise ValueError(f"Unknown action: {action}")
+        
+        return result, age
 
 # Global switch manager instance
 switch_manager = SwitchManager()
 
+if config.mock_mode and config.mock_fleet_size:
+    switch_manager.connect_mock_fleet(config.mock_fleet_size)
+
+class FleetJob:
+    """Results of one port security action fanned out across many switches"""
+    
+    def __init__(self, action: str, targets: List[Dict], interfaces: List[str], kwargs: Dict):
+        self.id = uuid.uuid4().hex
+        self.action = action
+        self.targets = targets
+        self.interfaces = interfaces
+        self.kwargs = kwargs
+        self.total = sum(len(target.get('interfaces') or interfaces) for target in targets)
+        self.results: List[Dict] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._pending_devices = len(targets)
+        self._cond = threading.Condition()
+    
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+    
+    def add_result(self, result: Dict):
+        with self._cond:
+            result['seq'] = len(self.results)
+            self.results.append(result)
+            self._cond.notify_all()
+    
+    def device_finished(self):
+        with self._cond:
+            self._pending_devices -= 1
+            finished = self._pending_devices <= 0
+            if finished:
+                self.finished_at = time.time()
+            self._cond.notify_all()
+        if finished:
+            event_bus.publish('fleet', self.summary())
+    
+    def wait_for_results(self, after: int, timeout: float) -> Tuple[List[Dict], bool]:
+        """Block until results past ``after`` exist or the job ends; return them and the done flag"""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.results) > after or self.done, timeout)
+            return self.results[after:], self.done
+    
+    def summary(self) -> Dict:
+        with self._cond:
+            succeeded = sum(1 for result in self.results if result['success'])
+            return {
+                'job_id': self.id,
+                'action': self.action,
+                'devices': len(self.targets),
+                'total': self.total,
+                'completed': len(self.results),
+                'succeeded': succeeded,
+                'failed': len(self.results) - succeeded,
+                'done': self.done,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+class StoredFleetJob:
+    """Read-only view of a fleet job run by another worker process
+
+    Its summary is refreshed in the state store as each device finishes; the
+    per-interface results are stored once the whole job is done.
+    """
+    
+    def __init__(self, snapshot: Dict):
+        self.snapshot = snapshot
+    
+    def wait_for_results(self, after: int, timeout: float) -> Tuple[List[Dict], bool]:
+        """Poll the store until results past ``after`` exist or the job ends"""
+        deadline = time.monotonic() + timeout
+        while not self.snapshot['done'] and time.monotonic() < deadline:
+            time.sleep(0.25)
+            self.snapshot = state_store.get('fleet_jobs', self.snapshot['job_id'], self.snapshot)
+        return self.snapshot.get('results', [])[after:], self.snapshot['done']
+    
+    def summary(self) -> Dict:
+        return {key: value for key, value in self.snapshot.items() if key != 'results'}
+
+class FleetExecutor:
+    """Runs port security actions across many switches on a bounded thread pool
+
+    ``max_workers`` bounds the total number of switches worked on at once and
+    ``per_device_limit`` bounds how many jobs may hold a session to the same
+    switch at the same time. Targets over the per-device limit wait in a
+    queue for that switch rather than in a pool thread, so repeated targets
+    never starve the other switches.
+    """
+    
+    def __init__(self, manager: SwitchManager, max_workers: int, per_device_limit: int, history: int):
+        self.manager = manager
+        self.per_device_limit = max(1, per_device_limit)
+        self.history = history
+        self.jobs: Dict[str, FleetJob] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='fleet')
+        # device -> targets running on it, and the ones waiting for a free slot
+        self._device_active: Dict[str, int] = {}
+        self._device_queues: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+    
+    def _schedule(self, device: str, task):
+        """Run ``task`` on the pool if the device has a free slot, otherwise queue it behind the device"""
+        with self._lock:
+            if self._device_active.get(device, 0) >= self.per_device_limit:
+                self._device_queues.setdefault(device, deque()).append(task)
+                return
+            self._device_active[device] = self._device_active.get(device, 0) + 1
+        self._executor.submit(task)
+    
+    def _release_device(self, device: str):
+        """Hand a finished target's slot to the next target queued for the device"""
+        with self._lock:
+            queue = self._device_queues.get(device)
+            task = queue.popleft() if queue else None
+            if queue is not None and not queue:
+                del self._device_queues[device]
+            if task is None:
+                self._device_active[device] -= 1
+                if not self._device_active[device]:
+                    del self._device_active[device]
+        if task is not None:
+            self._executor.submit(task)
+    
+    def submit(self, targets: List[Dict], action: str, interfaces: List[str], **kwargs) -> FleetJob:
+        """Start a fleet job; each target is a dict with device and optional credentials"""
+        job = FleetJob(action, targets, interfaces, kwargs)
+        with self._lock:
+            self.jobs[job.id] = job
+            finished = [job_id for job_id, old in self.jobs.items() if old.done]
+            for job_id in finished[:max(0, len(self.jobs) - self.history)]:
+                del self.jobs[job_id]
+        
+        self.manager.add_log(f"Fleet job {job.id}: {action} on {len(targets)} switches")
+        if not targets:
+            job.finished_at = time.time()
+        if state_store.shared:
+            state_store.set('fleet_jobs', job.id, dict(job.summary(), results=[]))
+            state_store.prune('fleet_jobs', self.history)
+        for target in targets:
+            context = contextvars.copy_context()
+            self._schedule(target['device'], lambda context=context, target=target: context.run(
+                self._run_device, job, target))
+        return job
+    
+    def get(self, job_id: str):
+        """Return a local FleetJob, a StoredFleetJob run by another worker, or None"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None and state_store.shared:
+            snapshot = state_store.get('fleet_jobs', job_id)
+            return StoredFleetJob(snapshot) if snapshot else None
+        return job
+    
+    def _run_device(self, job: FleetJob, target: Dict):
+        device = target['device']
+        interfaces = target.get('interfaces') or job.interfaces
+        try:
+            with command_priority(PRIORITY_BACKGROUND), trace_span('fleet.device', job_id=job.id, device=device):
+                self._run_on_switch(job, target, device, interfaces)
+        except Exception as e:
+            logger.error(f"Fleet job {job.id} failed on {device}: {str(e)}")
+        finally:
+            self._release_device(device)
+            job.device_finished()
+            if state_store.shared:
+                snapshot = job.summary()
+                if snapshot['done']:
+                    snapshot['results'] = job.wait_for_results(0, 0)[0]
+                state_store.set('fleet_jobs', job.id, snapshot)
+    
+    def _run_on_switch(self, job: FleetJob, target: Dict, device: str, interfaces: List[str]):
+        switch = self.manager.get_switch(device)
+        transient = not (switch and switch.connected)
+        if transient:
+            started = time.monotonic()
+            switch, message = self.manager.open_switch(
+                target.get('ip') or device,
+                target.get('username') or config.switch_username,
+                target.get('password') or config.switch_password
+            )
+            if not switch:
+                for interface in interfaces:
+                    audit_store.record(device, interface, job.action, dict(job.kwargs, fleet_job=job.id), False,
+                                       message, time.monotonic() - started)
+                    job.add_result({
+                        'device': device,
+                        'interface': interface,
+                        'success': False,
+                        'result': message,
+                        'duration': round(time.monotonic() - started, 3)
+                    })
+                return
+        
+        try:
+            for interface in interfaces:
+                started = time.monotonic()
+                age = None
+                try:
+                    result, age = self.manager.perform_action(switch, interface, job.action, device=device,
+                                                              **job.kwargs)
+                    success = True
+                except Exception as e:
+                    result = f"Action failed: {str(e)}"
+                    success = False
+                audit_store.record(device, interface, job.action, dict(job.kwargs, fleet_job=job.id), success,
+                                   result, time.monotonic() - started)
+                entry = {
+                    'device': device,
+                    'interface': interface,
+                    'success': success,
+                    'result': result,
+                    'duration': round(time.monotonic() - started, 3)
+                }
+                if age is not None:
+                    entry['age'] = round(age, 3)
+                job.add_result(entry)
+        finally:
+            if transient:
+                switch.disconnect()
+
+fleet_executor = FleetExecutor(switch_manager, config.fleet_max_workers,
+                               config.fleet_per_device_limit, config.fleet_job_history)
+
+class Job:
+    """A unit of switch work run in the background on behalf of an API request"""
+    
+    def __init__(self, kind: str, device: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.device = device
+        self.status = 'queued'
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.trace_id = current_trace_id()
+        self._done = threading.Event()
+    
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+    
+    def wait(self, timeout: float) -> bool:
+        return self._done.wait(timeout)
+    
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'device': self.device,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'trace_id': self.trace_id
+        }
+
+class StoredJob:
+    """Read-only view of a job run by another worker process, read from the shared state store"""
+    
+    def __init__(self, snapshot: Dict):
+        self.snapshot = snapshot
+    
+    @property
+    def id(self) -> str:
+        return self.snapshot['job_id']
+    
+    @property
+    def status(self) -> str:
+        return self.snapshot['status']
+    
+    @property
+    def result(self) -> Optional[Dict]:
+        return self.snapshot['result']
+    
+    @property
+    def done(self) -> bool:
+        return self.status in ('done', 'error')
+    
+    def wait(self, timeout: float) -> bool:
+        """Poll the store until the job finishes or ``timeout`` passes"""
+        deadline = time.monotonic() + timeout
+        while not self.done and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self.snapshot = state_store.get('jobs', self.id, self.snapshot)
+        return self.done
+    
+    def to_dict(self) -> Dict:
+        return self.snapshot
+
+class JobManager:
+    """Runs slow switch work on a bounded executor so request threads return immediately
+
+    A job's ``result`` is the JSON body the synchronous endpoint would have
+    returned. Completed jobs are announced on the event bus as ``job`` events.
+    With a shared state store every job's state is also saved there, so any
+    worker process can answer for it.
+    """
+    
+    def __init__(self, max_workers: int, history: int):
+        self.history = history
+        self.jobs: Dict[str, Job] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='job')
+        self._lock = threading.Lock()
+    
+    def submit(self, kind: str, func, *args, device: Optional[str] = None, **kwargs) -> Job:
+        job = Job(kind, device)
+        with self._lock:
+            self.jobs[job.id] = job
+            finished = [job_id for job_id, old in self.jobs.items() if old.done]
+            for job_id in finished[:max(0, len(self.jobs) - self.history)]:
+                del self.jobs[job_id]
+        if state_store.shared:
+            state_store.set('jobs', job.id, job.to_dict())
+            state_store.prune('jobs', self.history)
+        # Run in a copy of the caller's context so the job's spans join the request's trace
+        self._executor.submit(contextvars.copy_context().run, self._run, job, func, args, kwargs)
+        return job
+    
+    def get(self, job_id: str):
+        """Return a local Job, a StoredJob run by another worker, or None"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None and state_store.shared:
+            snapshot = state_store.get('jobs', job_id)
+            return StoredJob(snapshot) if snapshot else None
+        return job
+    
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if job.status == 'queued')
+    
+    def _run(self, job: Job, func, args, kwargs):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            with trace_span(f"job.{job.kind}", job_id=job.id):
+                job.result = func(*args, **kwargs)
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = 'error'
+        finally:
+            job.finished_at = time.time()
+            if state_store.shared:
+                state_store.set('jobs', job.id, job.to_dict())
+            job._done.set()
+            event_bus.publish('job', job.to_dict())
+
+job_manager = JobManager(config.job_max_workers, config.job_history)
+
+def job_response(job: Job):
+    """Answer a request whose work was handed to a job
+
+    Returns 202 with the job ID, unless the client passed ``wait=<seconds>``
+    and the job finished within that time, in which case the job's result is
+    returned directly as the synchronous endpoint used to.
+    """
+    wait = min(request.args.get('wait', 0, type=float), config.job_max_wait)
+    if wait > 0 and job.wait(wait) and job.status == 'done':
+        return jsonify(dict(job.result, job_id=job.id))
+    return jsonify(dict(job.to_dict(), url=f"/api/jobs/{job.id}")), 202
+
+def get_request_device() -> Optional[str]:
+    """Read the target device ID from the query string or JSON body"""
+    device = request.args.get('device')
+    if not device and request.is_json:
+        device = (request.get_json(silent=True) or {}).get('device')
+    return device or None
+
+TRACE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Polling and observability endpoints are not traced so they cannot crowd real work out of the trace store
+UNTRACED_PATHS = ('/static/', '/metrics', '/api/traces', '/api/logs', '/api/events', '/api/jobs/', '/api/fleet/jobs/')
+
+@app.before_request
+def start_request_timer():
+    """Time the request and open its root span, honouring a client-supplied X-Request-ID"""
+    g.request_started = time.perf_counter()
+    if request.path.startswith(UNTRACED_PATHS):
+        return
+    trace_id = request.headers.get('X-Request-ID', '')
+    g.trace_span, g.trace_token = begin_span(f"{request.method} {request.path}",
+                                             trace_id=trace_id if TRACE_ID_RE.match(trace_id) else None)
+
+@app.before_request
+def set_audit_user():
+    """Attribute audited actions to the X-User header, the authenticated user or the client address"""
+    _audit_user.set(request.headers.get('X-User') or request.remote_user or request.remote_addr)
+
+@app.after_request
+def observe_request(response):
+    """Record the request's handling time under its route pattern"""
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_seconds.observe(time.perf_counter() - started, request.method, route, response.status_code)
+    span = g.get('trace_span')
+    if span:
+        span.attributes['status'] = response.status_code
+        response.headers['X-Trace-ID'] = span.trace_id
+    return response
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    span = g.pop('trace_span', None)
+    if span:
+        if error:
+            span.error = str(error)
+        end_span(span, g.pop('trace_token'))
+
 @app.route('/')
 def index():
     """Main page - serve the HTML file directly"""
@@ -420,7 +3521,8 @@ def get_config():
     return jsonify({
         'mock_mode': config.mock_mode,
         'switch_ip': config.switch_ip,
-        'connected': switch_manager.connected
+        'device': switch_manager.resolve_device(get_request_device()),
+        'connected': switch_manager.is_registered(get_request_device())
     })
 
 @app.route('/api/config', methods=['POST'])
@@ -431,9 +3533,11 @@ def update_config():
     if 'mock_mode' in data:
         config.mock_mode = data['mock_mode']
         switch_manager.add_log(f"Switched to {'mock' if config.mock_mode else 'real'} mode")
-        # Disconnect if mode changed
-        if switch_manager.connected:
-            switch_manager.disconnect()
+        # Disconnect every session if mode changed; sessions and the pool are closed by jobs
+        switch_manager.disconnect_all(wait=False)
+        job_manager.submit('close-pool', close_pool_payload)
+        if config.mock_mode and config.mock_fleet_size:
+            switch_manager.connect_mock_fleet(config.mock_fleet_size)
     
     if 'switch_ip' in data:
         config.switch_ip = data['switch_ip']
@@ -441,52 +3545,47 @@ def update_config():
     
     return jsonify({'status': 'success'})
 
-@app.route('/api/connect', methods=['POST'])
-def connect():
-    """Connect to switch using config settings"""
-    success, message = switch_manager.connect()
-    return jsonify({
+def close_pool_payload() -> Dict:
+    """Close every idle pooled SSH session"""
+    connection_pool.close_all()
+    return {'pooled': connection_pool.size()}
+
+def connect_payload(device: Optional[str]) -> Dict:
+    """Connect to a switch using config settings and describe the outcome"""
+    success, message = switch_manager.connect(device=device)
+    return {
         'success': success,
         'message': message,
-        'connected': switch_manager.connected
-    })
+        'device': switch_manager.resolve_device(device),
+        'connected': switch_manager.is_connected(device)
+    }
 
-@app.route('/api/legacy-connect', methods=['POST'])
-def legacy_connect():
-    """Connect to switch using provided credentials (Legacy Form)"""
-    data = request.json
-    
-    ip = data.get('ip')
-    username = data.get('username')
-    password = data.get('password')
-    
-    if not ip or not username or not password:
-        return jsonify({
-            'success': False,
-            'message': 'IP, username, and password are required'
-        }), 400
-    
+@app.route('/api/connect', methods=['POST'])
+def connect():
+    """Connect to switch using config settings (runs as a job)"""
+    device = get_request_device()
+    return job_response(job_manager.submit('connect', connect_payload, device, device=device))
+
+def legacy_connect_payload(ip: str, username: str, password: str, device: str) -> Dict:
+    """Connect with explicit credentials and build the legacy form's status report"""
     # Temporarily store original mode
     original_mode = config.mock_mode
     
     # For legacy connection, force real mode
     config.mock_mode = False
     
-    success, message = switch_manager.connect(ip, username, password)
+    success, message = switch_manager.connect(ip, username, password, device=device)
     
     if success:
+        switch = switch_manager.get_switch(device)
         # Generate a detailed output for legacy form
         try:
-            if hasattr(switch_manager.switch, 'get_all_interfaces'):
-                interfaces = switch_manager.switch.get_all_interfaces()
-                interface_status = []
-                
-                for interface in interfaces[:5]:  # Limit to first 5 interfaces
-                    try:
-                        status = switch_manager.switch.get_interface_status(interface)
-                        interface_status.append(f"{interface}: {'Enabled' if status['port_security'] else 'Disabled'}")
-                    except:
-                        interface_status.append(f"{interface}: Status unknown")
+            if hasattr(switch, 'get_all_interface_status'):
+                statuses = switch_manager.get_all_port_security_status(switch, device)
+                interface_status = [
+                    f"{interface}: {'Enabled' if status['port_security'] else 'Disabled'}"
+                    for interface, (status, _) in list(statuses.items())[:5]  # Limit to first 5 interfaces
+                ]
                 
                 output = f"""Connection to {ip} successful!
 
@@ -505,84 +3604,518 @@ Connection established successfully. You can now use the port security actions a
         except Exception as e:
             output = f"Connection to {ip} successful!\n\nNote: Could not retrieve detailed status: {str(e)}"
         
-        return jsonify({
+        return {
             'success': True,
             'message': message,
             'output': output,
-            'connected': switch_manager.connected
-        })
+            'device': device,
+            'connected': switch_manager.is_connected(device)
+        }
     else:
         # Restore original mode on failure
         config.mock_mode = original_mode
-        return jsonify({
+        return {
             'success': False,
             'message': message
-        })
+        }
+
+@app.route('/api/legacy-connect', methods=['POST'])
+def legacy_connect():
+    """Connect to switch using provided credentials (Legacy Form, runs as a job)"""
+    data = request.json
+    
+    ip = data.get('ip')
+    username = data.get('username')
+    password = data.get('password')
+    
+    if not ip or not username or not password:
+        return jsonify({
+            'success': False,
+            'message': 'IP, username, and password are required'
+        }), 400
+    
+    device = data.get('device') or ip
+    return job_response(job_manager.submit('legacy-connect', legacy_connect_payload,
+                                           ip, username, password, device, device=device))
 
 @app.route('/api/disconnect', methods=['POST'])
 def disconnect():
     """Disconnect from switch"""
-    switch_manager.disconnect()
+    device = get_request_device()
+    switch_manager.disconnect(device, wait=False)
     return jsonify({
         'success': True,
         'message': 'Disconnected',
-        'connected': switch_manager.connected
+        'connected': switch_manager.is_registered(device)
     })
 
+@app.route('/api/devices', methods=['GET'])
+def list_devices():
+    """List registered switch sessions"""
+    return jsonify({'devices': switch_manager.list_devices()})
+
+@app.route('/api/mock/fleet', methods=['POST'])
+def create_mock_fleet():
+    """Register a fleet of mock switches on consecutive IPs (mock mode only)"""
+    if not config.mock_mode:
+        return jsonify({'error': 'Mock fleets are only available in mock mode'}), 400
+    
+    data = request.json or {}
+    try:
+        count = int(data.get('count', 0))
+        start = str(ipaddress.IPv4Address(data.get('start', '10.0.0.1')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if count < 1:
+        return jsonify({'error': 'count must be a positive integer'}), 400
+    
+    added = switch_manager.connect_mock_fleet(count, start)
+    return jsonify({'added': len(added), 'devices': len(switch_manager.list_devices())})
+
+@app.route('/api/breakers', methods=['GET'])
+def list_breakers():
+    """Show circuit breaker state for every switch that has been contacted"""
+    return jsonify({'breakers': [breaker.to_dict() for breaker in circuit_breakers.all()]})
+
+@app.route('/api/breakers/<key>/reset', methods=['POST'])
+def reset_breaker(key):
+    """Close a switch's circuit so the next connect is attempted immediately"""
+    breaker = circuit_breakers.find(key)
+    if not breaker:
+        return jsonify({'error': 'Breaker not found'}), 404
+    breaker.reset()
+    switch_manager.add_log(f"Reset circuit breaker for {key}")
+    return jsonify(breaker.to_dict())
+
+def interfaces_payload(device: str, refresh: bool = False, cached_only: bool = False) -> Optional[Dict]:
+    """Describe a device's interface list; None if ``cached_only`` and it is not cached"""
+    found = switch_manager.get_interfaces(device, refresh=refresh, cached_only=cached_only)
+    if found is None:
+        return None
+    interfaces, age = found
+    return {
+        'interfaces': interfaces,
+        'cached': age is not None,
+        'age': round(age or 0.0, 3)
+    }
+
 @app.route('/api/interfaces', methods=['GET'])
 def get_interfaces():
-    """Get available interfaces"""
-    if not switch_manager.connected:
-        return jsonify({'error': 'Not connected to switch'}), 400
+    """Get available interfaces from the per-device cache; a miss or ?refresh=1 runs as a job"""
+    device = switch_manager.resolve_device(get_request_device())
+    refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
     
     try:
-        if hasattr(switch_manager.switch, 'get_all_interfaces'):
-            interfaces = switch_manager.switch.get_all_interfaces()
-        else:
-            # Default interfaces for real switch
-            interfaces = ['GigabitEthernet0/1', 'GigabitEthernet0/2', 'GigabitEthernet0/3']
-        
-        return jsonify({'interfaces': interfaces})
+        payload = None if refresh else interfaces_payload(device, cached_only=True)
+        if payload is None:
+            return job_response(job_manager.submit('interfaces', interfaces_payload, device, refresh, device=device))
+        return jsonify(payload)
+    except ConnectionError:
+        return jsonify({'error': 'Not connected to switch'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def audit_rejected(device: Optional[str], interfaces: List, action, data: Dict, reason: str):
+    """Audit a port security request refused before it reached a switch, one row per interface"""
+    parameters = {key: value for key, value in data.items() if key not in ('interface', 'interfaces', 'action')}
+    for interface in interfaces or [None]:
+        audit_store.record(device, str(interface) if interface else None, str(action), parameters, False, reason, 0.0)
+
+def port_security_payload(interface: str, action: str, device: Optional[str], kwargs: Dict) -> Dict:
+    """Run a port security action and describe the outcome"""
+    success, result, age = switch_manager.execute_port_security_action(interface, action, device=device, **kwargs)
+    
+    response = {
+        'success': success,
+        'result': result,
+        'interface': interface,
+        'action': action,
+        'device': device
+    }
+    if age is not None:
+        response['age'] = round(age, 3)
+    return response
+
 @app.route('/api/port-security', methods=['POST'])
 def port_security_action():
-    """Execute port security action"""
+    """Execute port security action (runs as a job)"""
     data = request.json
     
     interface = data.get('interface')
     action = data.get('action')
+    device = switch_manager.resolve_device(get_request_device())
     
     if not interface or not action:
+        audit_rejected(device, [interface], action, data, 'Interface and action are required')
         return jsonify({'error': 'Interface and action are required'}), 400
     
     # Additional parameters for enable action
-    kwargs = {}
-    if action == 'enable':
-        kwargs['max_mac'] = data.get('max_mac', 1)
-        kwargs['violation_action'] = data.get('violation_action', 'shutdown')
+    try:
+        kwargs = validate_port_security_args(interface, action, data.get('max_mac', 1),
+                                             data.get('violation_action', 'shutdown'))
+    except ValueError as e:
+        audit_rejected(device, [interface], action, data, str(e))
+        return jsonify({'error': str(e)}), 400
     
-    success, result = switch_manager.execute_port_security_action(interface, action, **kwargs)
+    return job_response(job_manager.submit('port-security', port_security_payload,
+                                           interface, action, device, kwargs, device=device))
+
+def port_security_batch_payload(changes: List[Dict], device: Optional[str]) -> Dict:
+    """Apply a batch of port security changes and describe the outcome"""
+    success, result = switch_manager.execute_batch_action(changes, device=device)
     
-    return jsonify({
+    return {
         'success': success,
         'result': result,
-        'interface': interface,
-        'action': action
-    })
+        'interfaces': [change['interface'] for change in changes],
+        'device': device
+    }
+
+@app.route('/api/port-security/batch', methods=['POST'])
+def port_security_batch():
+    """Enable or disable port security on many interfaces in one config session
+
+    Accepts either ``interfaces`` plus shared ``action``/``max_mac``/``violation_action``,
+    or ``changes``: a list of per-interface objects with the same fields.
+    """
+    data = request.json or {}
+    
+    changes = data.get('changes')
+    if changes is None:
+        changes = [
+            {
+                'interface': interface,
+                'action': data.get('action'),
+                'max_mac': data.get('max_mac', 1),
+                'violation_action': data.get('violation_action', 'shutdown')
+            }
+            for interface in data.get('interfaces') or []
+        ]
+    
+    device = switch_manager.resolve_device(get_request_device())
+    if not changes:
+        audit_rejected(device, [], data.get('action'), dict(data, batch=True), 'Interfaces are required')
+        return jsonify({'error': 'Interfaces are required'}), 400
+    
+    error = None
+    for change in changes:
+        if not isinstance(change, dict) or not change.get('interface') or \
+                change.get('action') not in ('enable', 'disable'):
+            error = 'Each change needs an interface and an enable or disable action'
+            break
+        try:
+            change.update(validate_port_security_args(change['interface'], change['action'],
+                                                       change.get('max_mac', 1),
+                                                       change.get('violation_action', 'shutdown')))
+        except ValueError as e:
+            error = str(e)
+            break
+    if error:
+        for change in changes:
+            change = change if isinstance(change, dict) else {}
+            audit_rejected(device, [change.get('interface')], change.get('action'), dict(change, batch=True), error)
+        return jsonify({'error': error}), 400
+    
+    return job_response(job_manager.submit('port-security-batch', port_security_batch_payload,
+                                           changes, device, device=device))
+
+def port_security_status_payload(device: str, refresh: bool = False, cached_only: bool = False) -> Optional[Dict]:
+    """Describe every interface's port security status; None if ``cached_only`` and it is not cached"""
+    statuses = switch_manager.get_all_port_security_status(None, device, refresh=refresh, cached_only=cached_only)
+    if statuses is None:
+        return None
+    switch_manager.add_log(f"Retrieved port security status for {len(statuses)} interfaces")
+    return {
+        'device': device,
+        'interfaces': {
+            name: dict(status, age=round(age, 3))
+            for name, (status, age) in statuses.items()
+        }
+    }
+
+@app.route('/api/port-security/status', methods=['GET'])
+def port_security_status():
+    """Get port security status for every interface on a switch from the cache; a miss or ?refresh=1 runs as a job"""
+    device = switch_manager.resolve_device(get_request_device())
+    if not switch_manager.is_registered(device):
+        return jsonify({'error': 'Not connected to switch'}), 400
+    
+    refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    try:
+        payload = None if refresh else port_security_status_payload(device, cached_only=True)
+        if payload is None:
+            return job_response(job_manager.submit('port-security-status', port_security_status_payload,
+                                                   device, refresh, device=device))
+        return jsonify(payload)
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get a job's status and result; ``wait=<seconds>`` blocks until it finishes"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    wait = min(request.args.get('wait', 0, type=float), config.job_max_wait)
+    if wait > 0:
+        job.wait(wait)
+    return jsonify(job.to_dict())
+
+@app.route('/api/fleet/jobs', methods=['POST'])
+def start_fleet_job():
+    """Run a port security action across a list of switches"""
+    data = request.json or {}
+    
+    action = data.get('action')
+    devices = data.get('devices') or []
+    interfaces = data.get('interfaces') or ([data['interface']] if data.get('interface') else [])
+    
+    def reject(reason: str):
+        parameters = dict({key: value for key, value in data.items() if key != 'devices'}, fleet=True)
+        for entry in devices or [None]:
+            device = entry.get('device') or entry.get('ip') if isinstance(entry, dict) else entry
+            names = (entry.get('interfaces') if isinstance(entry, dict) else None) or interfaces
+            audit_rejected(str(device) if device else None, names, action, parameters, reason)
+        return jsonify({'error': reason}), 400
+    
+    if action not in PORT_SECURITY_ACTIONS:
+        return reject(f"Unknown action: {action}")
+    if not devices:
+        return reject('Devices are required')
+    
+    targets = []
+    for entry in devices:
+        target = {'device': entry} if isinstance(entry, str) else dict(entry)
+        target['device'] = target.get('device') or target.get('ip')
+        if not target['device']:
+            return reject('Each device needs a device ID or IP')
+        if not (target.get('interfaces') or interfaces):
+            return reject(f"No interfaces given for {target['device']}")
+        targets.append(target)
+    
+    try:
+        for interface in interfaces + [name for target in targets for name in target.get('interfaces') or []]:
+            validate_interface_name(interface)
+        kwargs = validate_port_security_settings(action, data.get('max_mac', 1),
+                                                 data.get('violation_action', 'shutdown'))
+    except ValueError as e:
+        return reject(str(e))
+    
+    job = fleet_executor.submit(targets, action, interfaces, **kwargs)
+    return jsonify(job.summary()), 202
+
+@app.route('/api/fleet/jobs/<job_id>', methods=['GET'])
+def get_fleet_job(job_id):
+    """Get fleet job progress and results after an optional ``after`` sequence number"""
+    job = fleet_executor.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    after = request.args.get('after', 0, type=int)
+    results, _ = job.wait_for_results(after, 0)
+    return jsonify(dict(job.summary(), results=results))
+
+@app.route('/api/fleet/jobs/<job_id>/stream', methods=['GET'])
+def stream_fleet_job(job_id):
+    """Stream fleet job results as newline-delimited JSON as each device finishes"""
+    job = fleet_executor.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        after = request.args.get('after', 0, type=int)
+        while True:
+            results, done = job.wait_for_results(after, 15)
+            for result in results:
+                yield json.dumps(result) + '\n'
+            after += len(results)
+            if done and not results:
+                yield json.dumps(dict(job.summary(), event='done')) + '\n'
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
-    """Get application logs"""
-    return jsonify({'logs': switch_manager.logs[-50:]})  # Return last 50 logs
+    """Get application logs
+
+    Without ``after`` the last 50 entries are returned. With ``after=<seq>`` only
+    newer entries are returned; ``reset`` tells the client the log was cleared
+    since its cursor and it should drop what it shows.
+    """
+    logs = switch_manager.logs
+    after = request.args.get('after', type=int)
+    if after is None:
+        entries = logs.tail(50)  # Return last 50 logs
+    else:
+        entries = logs.since(after, request.args.get('limit', 500, type=int))
+    
+    return jsonify({
+        'logs': entries,
+        'last_seq': logs.last_seq,
+        'event_id': event_bus.last_id,
+        'reset': after is not None and 0 < after <= logs.reset_seq
+    })
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of log entries, action results and fleet job completions
+
+    Event types are ``log``, ``action``, ``fleet`` and ``clear`` (logs were cleared).
+
+    Resumes after the ``Last-Event-ID`` header (or ``last_event_id`` query
+    parameter); without either, only events published from now on are sent.
+    A ``reset`` event means events were missed and the client should reload.
+    The stream ends after ``EVENT_STREAM_MAX_AGE`` seconds so it does not pin
+    a server thread for good; EventSource reconnects with ``Last-Event-ID``.
+    
+    With a shared log, entries other workers wrote are read from it every
+    ``EVENT_LOG_POLL`` seconds and sent as ``log`` events without an ID.
+    """
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        after = int(last_id) if last_id else event_bus.last_id
+    except ValueError:
+        after = event_bus.last_id
+    
+    logs = switch_manager.logs
+    shared_logs = isinstance(logs, SharedLogBuffer)
+    
+    def generate():
+        cursor = after
+        log_seq = logs.last_seq
+        deadline = time.monotonic() + config.event_stream_max_age
+        last_sent = time.monotonic()
+        yield "retry: 3000\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            timeout = min(config.event_heartbeat, remaining)
+            if shared_logs:
+                timeout = min(timeout, config.event_log_poll)
+            events, missed = event_bus.wait(cursor, timeout)
+            chunks = []
+            if missed:
+                chunks.append("event: reset\ndata: {}\n\n")
+                if not events:
+                    # Resumed ahead of a bus that has published nothing yet
+                    cursor = 0
+            for event_id, event_type, data in events:
+                if event_type == 'log' and shared_logs:
+                    if data['seq'] <= log_seq:
+                        # Already relayed from the shared log
+                        continue
+                    log_seq = data['seq']
+                chunks.append(f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n")
+            if events:
+                cursor = events[-1][0]
+            if shared_logs and logs.last_seq > log_seq:
+                # Entries from other workers; seqs commit in order, so nothing local is skipped
+                for entry in logs.since(log_seq, config.log_capacity):
+                    chunks.append(f"event: log\ndata: {json.dumps(entry)}\n\n")
+                    log_seq = entry['seq']
+            if chunks:
+                yield ''.join(chunks)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= config.event_heartbeat:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @app.route('/api/logs/clear', methods=['POST'])
 def clear_logs():
     """Clear application logs"""
-    switch_manager.logs = []
+    switch_manager.logs.clear()
+    event_bus.publish('clear', {'seq': switch_manager.logs.last_seq})
     switch_manager.add_log("Logs cleared")
     return jsonify({'status': 'success'})
 
+metrics.register('cisco_app_cache_hits_total', 'Cache lookups answered from cache', 'counter', ('cache',),
+                 lambda: [(('interfaces',), switch_manager.interface_cache.hits),
+                          (('status',), switch_manager.status_cache.hits)])
+metrics.register('cisco_app_cache_misses_total', 'Cache lookups that had to query the switch', 'counter', ('cache',),
+                 lambda: [(('interfaces',), switch_manager.interface_cache.misses),
+                          (('status',), switch_manager.status_cache.misses)])
+metrics.register('cisco_app_switch_reads_total',
+                 'Show commands requested, by whether they ran or shared an identical in-flight read',
+                 'counter', ('outcome',),
+                 lambda: [(('executed',), read_flights.executed), (('coalesced',), read_flights.coalesced)])
+metrics.register('cisco_app_rate_limit_waiting', 'Switch commands queued behind a rate limiter, per switch',
+                 'gauge', ('switch', 'profile'),
+                 lambda: [((limiter.key, limiter.profile.pattern), limiter.waiting) for limiter in rate_limiters.all()])
+metrics.register('cisco_app_rate_limit_sessions', 'SSH sessions open to a switch, pooled idle ones included',
+                 'gauge', ('switch', 'profile'),
+                 lambda: [((limiter.key, limiter.profile.pattern), limiter.open_sessions)
+                          for limiter in rate_limiters.all()])
+metrics.register('cisco_app_pool_idle_sessions', 'Idle SSH sessions held by the connection pool', 'gauge', (),
+                 lambda: [((), connection_pool.size())])
+metrics.register('cisco_app_devices_registered', 'Switch sessions in the device registry', 'gauge', (),
+                 lambda: [((), len(state_store.items('devices')))])
+metrics.register('cisco_app_circuit_breaker_state', 'Circuit breaker state per switch (1 for the current state)',
+                 'gauge', ('switch', 'state'),
+                 lambda: [((breaker.key, state), int(breaker.state == state))
+                          for breaker in circuit_breakers.all()
+                          for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)])
+metrics.register('cisco_app_job_queue_depth', 'Background jobs waiting for a worker', 'gauge', (),
+                 lambda: [((), job_manager.queue_depth())])
+
+def parse_time_param(value: Optional[str]) -> Optional[float]:
+    """Read a query-string time given as epoch seconds or an ISO 8601 timestamp"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/audit', methods=['GET'])
+def query_audit():
+    """Query the audit trail, newest first; pass the returned next_cursor as ?cursor= for the next page"""
+    try:
+        since = parse_time_param(request.args.get('since'))
+        until = parse_time_param(request.args.get('until'))
+    except ValueError:
+        return jsonify({'error': 'since/until must be epoch seconds or ISO 8601 timestamps'}), 400
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    
+    entries, next_cursor = audit_store.query(
+        device=request.args.get('device'),
+        interface=request.args.get('interface'),
+        action=request.args.get('action'),
+        user=request.args.get('user'),
+        since=since,
+        until=until,
+        before=request.args.get('cursor', type=int),
+        limit=limit
+    )
+    return jsonify({'entries': entries, 'next_cursor': next_cursor})
+
+@app.route('/api/traces', methods=['GET'])
+def list_traces():
+    """Summarize the most recent traces, newest first"""
+    limit = max(1, min(request.args.get('limit', 50, type=int), config.trace_capacity))
+    return jsonify({'traces': trace_store.recent(limit)})
+
+@app.route('/api/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    """Every recorded span of one trace, ordered by start time"""
+    spans = trace_store.get(trace_id)
+    if spans is None:
+        return jsonify({'error': 'Trace not found'}), 404
+    return jsonify({'trace_id': trace_id, 'spans': spans})
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose latency histograms, cache, pool, breaker and job metrics in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""API latency and throughput benchmark
+
+Drives the Flask app through the test client or over real HTTP, against the
+mock fleet or the local SSH simulator, and reports p50/p95/p99 latency and
+requests/sec per endpoint and concurrency level. Run from the repository root:
+
+    python bench/bench_api.py [--target mock|simulator] [--transport client|http] [--concurrency 1,8,32]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as switch_app  # noqa: E402
+
+# Endpoint name -> (method, path, JSON body) for a device and one of its interfaces
+SCENARIOS = {
+    'interfaces': lambda device, interface: ('GET', f"/api/interfaces?device={device}", None),
+    'port-security': lambda device, interface: (
+        'POST', '/api/port-security?wait=30', {'device': device, 'interface': interface, 'action': 'status'}),
+    'logs': lambda device, interface: ('GET', '/api/logs?limit=100', None),
+}
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+class TestClientTransport:
+    """Sends requests through Flask's in-process test client"""
+
+    name = 'client'
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: Optional[Dict]) -> int:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = switch_app.app.test_client()
+        return client.open(path, method=method, json=body).status_code
+
+    def close(self):
+        pass
+
+class HTTPTransport:
+    """Sends requests over HTTP to the app served by werkzeug on a free port"""
+
+    name = 'http'
+
+    def __init__(self):
+        from werkzeug.serving import make_server
+        self._server = make_server('127.0.0.1', 0, switch_app.app, threaded=True)
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def request(self, method: str, path: str, body: Optional[Dict]) -> int:
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            payload = json.dumps(body) if body is not None else None
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+    def close(self):
+        self._server.shutdown()
+
+def setup_mock(devices: int) -> List[Tuple[str, str]]:
+    """Register a mock fleet and return (device, interface) targets"""
+    switch_app.config.mock_mode = True
+    switch_app.switch_manager.disconnect_all()
+    return [(ip, switch_app.switch_manager.get_interfaces(ip)[0][0])
+            for ip in switch_app.switch_manager.connect_mock_fleet(devices)]
+
+def simulated_seconds() -> float:
+    """Latency the mock switches have accounted for so far (see MOCK_LATENCY)"""
+    with switch_app.switch_manager._lock:
+        sessions = list(switch_app.switch_manager.sessions.values())
+    return sum(getattr(session, 'simulated_time', 0.0) for session in sessions)
+
+def setup_simulator(ports: int, delay: float) -> Tuple[List[Tuple[str, str]], Callable]:
+    """Start one simulated switch, connect to it over SSH and return its targets and a stop function"""
+    from ios_simulator import start_simulators
+
+    instance = start_simulators(1, ports=ports, delay=delay, seed=0)[0]
+    switch_app.config.mock_mode = False
+    switch_app.config.ssh_port = instance.port
+    switch_app.switch_manager.disconnect_all()
+    success, message = switch_app.switch_manager.connect('127.0.0.1', 'admin', 'admin')
+    if not success:
+        instance.stop()
+        raise RuntimeError(f"Could not connect to the simulator: {message}")
+
+    def stop():
+        switch_app.switch_manager.disconnect_all()
+        switch_app.connection_pool.close_all()
+        instance.stop()
+
+    return [('127.0.0.1', switch_app.switch_manager.get_interfaces('127.0.0.1')[0][0])], stop
+
+def run_scenario(transport, scenario: str, targets: List[Tuple[str, str]], concurrency: int,
+                 requests: int) -> Dict:
+    """Issue ``requests`` requests from ``concurrency`` threads and summarize them"""
+    build = SCENARIOS[scenario]
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(offset: int):
+        nonlocal errors
+        for index in range(offset, requests, concurrency):
+            method, path, body = build(*targets[index % len(targets)])
+            started = time.perf_counter()
+            try:
+                ok = transport.request(method, path, body) == 200
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    duration = time.perf_counter() - started
+
+    return {
+        'endpoint': scenario,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'rps': requests / duration,
+    }
+
+def measure(target: str, transport_name: str, concurrency: List[int], requests: int, devices: int = 100,
+            ports: int = 48, delay: float = 0.0) -> List[Dict]:
+    """Benchmark every endpoint at each concurrency level against one target"""
+    logging.getLogger(switch_app.__name__).setLevel(logging.WARNING)
+    stop = None
+    if target == 'mock':
+        targets = setup_mock(devices)
+    else:
+        targets, stop = setup_simulator(ports, delay)
+    transport = HTTPTransport() if transport_name == 'http' else TestClientTransport()
+
+    results = []
+    try:
+        for scenario in SCENARIOS:
+            for level in concurrency:
+                simulated = simulated_seconds()
+                result = run_scenario(transport, scenario, targets, level, requests)
+                if target == 'mock':
+                    # Switch time a real fleet with this latency would have added, per request
+                    result['simulated_ms'] = (simulated_seconds() - simulated) / requests * 1000
+                results.append(dict(result, target=target, transport=transport.name))
+    finally:
+        transport.close()
+        if stop:
+            stop()
+    return results
+
+def print_results(results: List[Dict]):
+    print(f"{'target':<10} {'transport':<9} {'endpoint':<14} {'conc':>5} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'req/s':>9} {'errors':>7} {'sim ms':>8}")
+    for result in results:
+        simulated = f"{result['simulated_ms']:>8.2f}" if 'simulated_ms' in result else f"{'-':>8}"
+        print(f"{result['target']:<10} {result['transport']:<9} {result['endpoint']:<14} {result['concurrency']:>5} "
+              f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+              f"{result['rps']:>9.1f} {result['errors']:>7} {simulated}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=['mock', 'simulator'], default='mock')
+    parser.add_argument('--transport', choices=['client', 'http'], default='client')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated client thread counts')
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint and concurrency level')
+    parser.add_argument('--devices', type=int, default=100, help='mock switches to spread requests over')
+    parser.add_argument('--ports', type=int, default=48, help='ports on the simulated switch')
+    parser.add_argument('--delay', type=float, default=0.0, help='simulator delay per command, in seconds')
+    args = parser.parse_args()
+    print_results(measure(args.target, args.transport, [int(level) for level in args.concurrency.split(',')],
+                          args.requests, args.devices, args.ports, args.delay))
@@ -0,0 +1,71 @@
+"""Microbenchmark of the regex fast-path parser against TextFSM
+
+Renders IOS show output from the switch simulator for stacks of increasing
+size and times both parsers on each command. Run from the repository root:
+
+    python bench/bench_parsers.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import regex_parser, textfsm_parser  # noqa: E402
+from ios_simulator import SimulatedSwitch  # noqa: E402
+
+# (stack members, ports per member, sticky MACs per connected port)
+SIZES = [
+    (1, 24, 1),
+    (1, 48, 2),
+    (4, 48, 4),
+    (9, 48, 8),
+]
+
+def build_outputs(members: int, ports: int, macs: int):
+    """Render show output from a simulated stack with every port secured"""
+    switch = SimulatedSwitch('BENCH', members=members, ports=ports, secured_ratio=1.0,
+                             macs_per_port=macs, seed=0)
+    return {
+        'show interfaces status': switch.render_interfaces_status(),
+        'show port-security': switch.render_port_security(),
+        'show port-security address': switch.render_port_security_address(),
+    }
+
+def best_time(func, repeat: int) -> float:
+    """Best per-call time in seconds over ``repeat`` rounds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def measure(repeat: int) -> List[Dict]:
+    """Time both parsers on every command and stack size"""
+    results = []
+    for members, ports, macs in SIZES:
+        for command, output in build_outputs(members, ports, macs).items():
+            fast = regex_parser.parse(command, output)
+            slow = textfsm_parser.parse(command, output)
+            if fast != slow:
+                raise AssertionError(f"Parsers disagree on '{command}' ({members}x{ports})")
+
+            results.append({
+                'command': command,
+                'size': f"{members}x{ports}x{macs}",
+                'lines': len(output.splitlines()),
+                'regex_ms': best_time(lambda: regex_parser.parse(command, output), repeat) * 1000,
+                'textfsm_ms': best_time(lambda: textfsm_parser.parse(command, output), repeat) * 1000,
+            })
+    return results
+
+def print_results(results: List[Dict]):
+    print(f"{'command':<28} {'size':>10} {'lines':>7} {'regex ms':>10} {'textfsm ms':>11} {'speedup':>8}")
+    for result in results:
+        print(f"{result['command']:<28} {result['size']:>10} {result['lines']:>7} {result['regex_ms']:>10.3f} "
+              f"{result['textfsm_ms']:>11.3f} {result['textfsm_ms'] / result['regex_ms']:>7.1f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='timing rounds per measurement')
+    print_results(measure(parser.parse_args().repeat))
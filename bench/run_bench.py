@@ -0,0 +1,100 @@
+"""Benchmark suite: API latency/throughput and parser cost, with baseline comparison
+
+Runs the API benchmark against the mock fleet and the SSH simulator over
+both the test client and real HTTP, then the parser microbenchmarks, and
+writes everything to a JSON file. With ``--baseline`` the run is compared
+against an earlier results file and the script exits non-zero when any
+measurement regressed by more than ``--tolerance``. Run from the
+repository root:
+
+    python bench/run_bench.py --output results.json [--baseline baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_api  # noqa: E402
+import bench_parsers  # noqa: E402
+
+# Metric -> True when larger values are better; p99 is reported but too noisy to gate on
+METRICS = {
+    'p50_ms': False,
+    'p95_ms': False,
+    'rps': True,
+    'regex_ms': False,
+    'textfsm_ms': False,
+}
+
+def result_key(result: Dict) -> str:
+    """Stable name identifying a measurement across runs"""
+    if 'endpoint' in result:
+        return f"api/{result['target']}/{result['transport']}/{result['endpoint']}/c{result['concurrency']}"
+    return f"parser/{result['command']}/{result['size']}"
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Describe every metric that is worse than the baseline by more than ``tolerance``"""
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if not before:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in result or not before.get(metric):
+                continue
+            change = (result[metric] - before[metric]) / before[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{result_key(result)} {metric}: {before[metric]:.3f} -> "
+                                   f"{result[metric]:.3f} ({change:+.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='bench_results.json', help='file to write results to')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown before flagging')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated client thread counts')
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint and concurrency level')
+    parser.add_argument('--devices', type=int, default=100, help='mock switches to spread requests over')
+    parser.add_argument('--targets', default='mock,simulator', help='comma-separated API targets')
+    parser.add_argument('--transports', default='client,http', help='comma-separated API transports')
+    parser.add_argument('--repeat', type=int, default=5, help='parser timing rounds per measurement')
+    args = parser.parse_args()
+
+    concurrency = [int(level) for level in args.concurrency.split(',')]
+    results = []
+    for target in args.targets.split(','):
+        for transport in args.transports.split(','):
+            results.extend(bench_api.measure(target, transport, concurrency, args.requests, args.devices))
+    bench_api.print_results(results)
+    print()
+    parsers = bench_parsers.measure(args.repeat)
+    bench_parsers.print_results(parsers)
+    results.extend(parsers)
+
+    with open(args.output, 'w') as handle:
+        json.dump({
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, handle, indent=2)
+    print(f"\nWrote {len(results)} measurements to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(results, json.load(handle)['results'], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+if __name__ == '__main__':
+    main()
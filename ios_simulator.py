@@ -0,0 +1,490 @@
+"""Local IOS-like SSH switch simulator
+
+Runs one or more fake Catalyst switches on localhost SSH ports so the real
+CiscoSwitch/netmiko code path can be exercised and load-tested without lab
+hardware. Each simulated switch emulates the IOS prompts, ``--More--``
+paging, config mode (including ``interface range``) and the show/clear
+commands the app uses, keeping port security state in memory.
+
+    python ios_simulator.py --count 10 --base-port 2200 --ports 48 --delay 0.05
+
+Then point the app at it, e.g. ``MOCK_MODE=false SSH_PORT=2200``.
+"""
+import argparse
+import logging
+import random
+import re
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+
+import paramiko
+
+logger = logging.getLogger('ios_simulator')
+
+INTERFACE_TYPES = {
+    'gigabitethernet': ('GigabitEthernet', 'Gi'),
+    'fastethernet': ('FastEthernet', 'Fa'),
+    'tengigabitethernet': ('TenGigabitEthernet', 'Te'),
+}
+
+INTERFACE_RE = re.compile(r'^\s*([A-Za-z-]+)\s*(\d+(?:/\d+)*)\s*$')
+RANGE_PART_RE = re.compile(r'^\s*([A-Za-z-]+)\s*((?:\d+/)*)(\d+)\s*(?:-\s*(\d+))?\s*$')
+
+INVALID_INPUT = "% Invalid input detected at '^' marker."
+
+def canonical_interface(name: str) -> Optional[str]:
+    """Expand an abbreviated interface name the way IOS does (``gi1/0/1`` -> ``GigabitEthernet1/0/1``)"""
+    match = INTERFACE_RE.match(name)
+    if not match:
+        return None
+    prefix, number = match.groups()
+    candidates = [full for key, (full, _) in INTERFACE_TYPES.items() if key.startswith(prefix.lower())]
+    return candidates[0] + number if len(candidates) == 1 else None
+
+def short_interface(name: str) -> str:
+    """Abbreviate a full interface name for table output (``GigabitEthernet1/0/1`` -> ``Gi1/0/1``)"""
+    for full, short in INTERFACE_TYPES.values():
+        if name.startswith(full):
+            return short + name[len(full):]
+    return name
+
+def dotted_mac(index: int) -> str:
+    digits = f"{index:012x}"
+    return f"{digits[0:4]}.{digits[4:8]}.{digits[8:12]}"
+
+class SimulatedSwitch:
+    """Port security state of one simulated switch (shared by all its SSH sessions)"""
+
+    def __init__(self, hostname: str, members: int = 1, ports: int = 48, secured_ratio: float = 0.5,
+                 macs_per_port: int = 1, seed: Optional[int] = None):
+        self.hostname = hostname
+        self.lock = threading.Lock()
+        rng = random.Random(seed)
+        self.interfaces: Dict[str, Dict] = {}
+        mac_index = rng.randrange(1 << 32)
+        for member in range(1, members + 1):
+            for port in range(1, ports + 1):
+                secured = rng.random() < secured_ratio
+                state = rng.choice(['connected', 'connected', 'notconnect'])
+                macs = []
+                if secured and state == 'connected':
+                    for _ in range(macs_per_port):
+                        macs.append(dotted_mac(mac_index))
+                        mac_index += 1
+                self.interfaces[f"GigabitEthernet{member}/0/{port}"] = {
+                    'port_security': secured,
+                    'max_mac_addresses': max(1, macs_per_port),
+                    'violation_action': rng.choice(['shutdown', 'restrict', 'protect']) if secured else 'shutdown',
+                    'sticky_macs': macs,
+                    'violation_count': 0,
+                    'state': state,
+                    'vlan': 10 + (port % 20),
+                    'description': f"desk-{member}-{port}" if state == 'connected' else ''
+                }
+
+    def render_interfaces_status(self) -> str:
+        lines = ["Port      Name               Status       Vlan       Duplex  Speed Type"]
+        for name, interface in self.interfaces.items():
+            connected = interface['state'] == 'connected'
+            lines.append(f"{short_interface(name):<9} {interface['description'][:18]:<18} {interface['state']:<12} "
+                         f"{interface['vlan']:<10} {'a-full' if connected else 'auto':>6} "
+                         f"{'a-1000' if connected else 'auto':>6} 10/100/1000BaseTX")
+        return '\n'.join(lines)
+
+    def render_port_security(self) -> str:
+        lines = [
+            "Secure Port  MaxSecureAddr  CurrentAddr  SecurityViolation  Security Action",
+            "                (Count)       (Count)          (Count)",
+            "---------------------------------------------------------------------------",
+        ]
+        for name, interface in self.interfaces.items():
+            if interface['port_security']:
+                lines.append(f"{short_interface(name):>11} {interface['max_mac_addresses']:>14} "
+                             f"{len(interface['sticky_macs']):>12} {interface['violation_count']:>18} "
+                             f"{interface['violation_action'].capitalize():>16}")
+        lines.append("---------------------------------------------------------------------------")
+        lines.append("Total Addresses in System (excluding one mac per port)     : 0")
+        lines.append("Max Addresses limit in System (excluding one mac per port) : 4096")
+        return '\n'.join(lines)
+
+    def render_port_security_address(self) -> str:
+        lines = [
+            "               Secure Mac Address Table",
+            "-----------------------------------------------------------------------------",
+            "Vlan    Mac Address       Type                          Ports   Remaining Age",
+            "                                                                   (mins)",
+            "----    -----------       ----                          -----   -------------",
+        ]
+        total = 0
+        for name, interface in self.interfaces.items():
+            if not interface['port_security']:
+                continue
+            for mac in interface['sticky_macs']:
+                lines.append(f"{interface['vlan']:>4}    {mac}    {'SecureSticky':<29} {short_interface(name):<9}  -")
+                total += 1
+        lines.append("-----------------------------------------------------------------------------")
+        lines.append(f"Total Addresses in System (excluding one mac per port)     : {total}")
+        return '\n'.join(lines)
+
+    def render_port_security_interface(self, name: str) -> str:
+        interface = self.interfaces[name]
+        enabled = interface['port_security']
+        if not enabled:
+            status = 'Secure-down'
+        elif interface['state'] == 'err-disabled':
+            status = 'Secure-shutdown'
+        else:
+            status = 'Secure-up' if interface['state'] == 'connected' else 'Secure-down'
+        last = f"{interface['sticky_macs'][-1]}:{interface['vlan']}" if interface['sticky_macs'] else "0000.0000.0000:0"
+        return '\n'.join([
+            f"Port Security              : {'Enabled' if enabled else 'Disabled'}",
+            f"Port Status                : {status}",
+            f"Violation Mode             : {interface['violation_action'].capitalize()}",
+            "Aging Time                 : 0 mins",
+            "Aging Type                 : Absolute",
+            "SecureStatic Address Aging : Disabled",
+            f"Maximum MAC Addresses      : {interface['max_mac_addresses']}",
+            f"Total MAC Addresses        : {len(interface['sticky_macs'])}",
+            "Configured MAC Addresses   : 0",
+            f"Sticky MAC Addresses       : {len(interface['sticky_macs'])}",
+            f"Last Source Address:Vlan   : {last}",
+            f"Security Violation Count   : {interface['violation_count']}",
+        ])
+
+    def render_version(self) -> str:
+        return '\n'.join([
+            "Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.0(2)SE11, RELEASE SOFTWARE (fc3)",
+            f"{self.hostname} uptime is 1 day, 2 hours, 30 minutes",
+            "Model number                    : WS-C2960-24TT-L",
+        ])
+
+    def expand_range(self, spec: str) -> Optional[List[str]]:
+        """Resolve an ``interface range`` argument to existing interface names"""
+        names = []
+        for part in spec.split(','):
+            match = RANGE_PART_RE.match(part)
+            if not match:
+                return None
+            prefix, module, start, end = match.groups()
+            for port in range(int(start), int(end or start) + 1):
+                name = canonical_interface(f"{prefix}{module}{port}")
+                if name not in self.interfaces:
+                    return None
+                names.append(name)
+        return names
+
+class CLISession:
+    """Line discipline and command interpreter for one SSH shell"""
+
+    def __init__(self, switch: SimulatedSwitch, delay: float = 0.0, jitter: float = 0.0):
+        self.switch = switch
+        self.delay = delay
+        self.jitter = jitter
+        self.mode = 'exec'
+        self.selected: List[str] = []
+        self.terminal_length = 24
+
+    @property
+    def prompt(self) -> str:
+        suffix = {
+            'exec': '#',
+            'config': '(config)#',
+            'config-if': '(config-if)#',
+            'config-if-range': '(config-if-range)#',
+        }[self.mode]
+        return self.switch.hostname + suffix
+
+    def handle(self, line: str) -> str:
+        """Run one command line and return its output (without the trailing prompt)"""
+        command = line.strip()
+        if not command:
+            return ''
+        if self.delay or self.jitter:
+            time.sleep(self.delay + random.uniform(0, self.jitter))
+        with self.switch.lock:
+            if self.mode == 'exec':
+                return self._exec(command)
+            return self._config(command)
+
+    def _exec(self, command: str) -> str:
+        words = command.split()
+        lowered = command.lower()
+        if words[0] in ('terminal', 'term') and len(words) == 3:
+            if words[1].startswith('len'):
+                self.terminal_length = int(words[2])
+            return ''
+        if lowered in ('configure terminal', 'conf t', 'config t', 'configure t'):
+            self.mode = 'config'
+            return "Enter configuration commands, one per line.  End with CNTL/Z."
+        if lowered in ('enable', 'exit', 'end'):
+            return ''
+        if re.match(r'^sh(ow?)?\s+int(erfaces?)?\s+stat(us)?$', lowered):
+            return self.switch.render_interfaces_status()
+        if re.match(r'^sh(ow?)?\s+port-sec(urity)?\s+addr(ess)?$', lowered):
+            return self.switch.render_port_security_address()
+        if re.match(r'^sh(ow?)?\s+port-sec(urity)?$', lowered):
+            return self.switch.render_port_security()
+        match = re.match(r'^sh(?:ow?)?\s+port-sec(?:urity)?\s+int(?:erface)?\s+(.+)$', command, re.I)
+        if match:
+            name = canonical_interface(match.group(1))
+            if name not in self.switch.interfaces:
+                return INVALID_INPUT
+            return self.switch.render_port_security_interface(name)
+        if re.match(r'^sh(ow?)?\s+ver(sion)?$', lowered):
+            return self.switch.render_version()
+        match = re.match(r'^clear\s+port-security\s+(?:sticky|all)\s+interface\s+(.+)$', command, re.I)
+        if match:
+            name = canonical_interface(match.group(1))
+            if name not in self.switch.interfaces:
+                return INVALID_INPUT
+            self.switch.interfaces[name]['sticky_macs'] = []
+            return ''
+        return INVALID_INPUT
+
+    def _config(self, command: str) -> str:
+        lowered = command.lower()
+        if lowered == 'end':
+            self.mode = 'exec'
+            self.selected = []
+            return ''
+        if lowered == 'exit':
+            if self.mode == 'config':
+                self.mode = 'exec'
+            else:
+                self.mode = 'config'
+                self.selected = []
+            return ''
+
+        match = re.match(r'^int(?:erface)?\s+range\s+(.+)$', command, re.I)
+        if match:
+            names = self.switch.expand_range(match.group(1))
+            if not names:
+                return INVALID_INPUT
+            self.mode, self.selected = 'config-if-range', names
+            return ''
+        match = re.match(r'^int(?:erface)?\s+(.+)$', command, re.I)
+        if match:
+            name = canonical_interface(match.group(1))
+            if name not in self.switch.interfaces:
+                return INVALID_INPUT
+            self.mode, self.selected = 'config-if', [name]
+            return ''
+
+        if self.mode == 'config' or not self.selected:
+            return INVALID_INPUT if not lowered.startswith(('hostname', 'no ', 'do ')) else ''
+
+        interfaces = [self.switch.interfaces[name] for name in self.selected]
+        if lowered == 'switchport port-security':
+            for interface in interfaces:
+                interface['port_security'] = True
+            return ''
+        if lowered == 'no switchport port-security':
+            for interface in interfaces:
+                interface['port_security'] = False
+                interface['sticky_macs'] = []
+            return ''
+        match = re.match(r'^switchport port-security maximum (\d+)$', lowered)
+        if match:
+            for interface in interfaces:
+                interface['max_mac_addresses'] = int(match.group(1))
+            return ''
+        match = re.match(r'^switchport port-security violation (protect|restrict|shutdown)$', lowered)
+        if match:
+            for interface in interfaces:
+                interface['violation_action'] = match.group(1)
+            return ''
+        if lowered.startswith(('switchport', 'description', 'shutdown', 'no shutdown')):
+            return ''
+        return INVALID_INPUT
+
+class SimulatorServer(paramiko.ServerInterface):
+    """Accepts password logins and interactive shells"""
+
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+        self.shell_requested = threading.Event()
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_auth_password(self, username, password):
+        if username == self.username and password == self.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_requested.set()
+        return True
+
+class SimulatorInstance:
+    """One simulated switch listening on a localhost port"""
+
+    def __init__(self, switch: SimulatedSwitch, host: str, port: int, host_key: paramiko.PKey,
+                 username: str, password: str, delay: float = 0.0, jitter: float = 0.0):
+        self.switch = switch
+        self.host = host
+        self.port = port
+        self.host_key = host_key
+        self.username = username
+        self.password = password
+        self.delay = delay
+        self.jitter = jitter
+        self._socket: Optional[socket.socket] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self.port = self._socket.getsockname()[1]
+        self._socket.listen(100)
+        threading.Thread(target=self._accept_loop, name=f"sim-{self.port}", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._socket:
+            self._socket.close()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                client, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client: socket.socket):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        server = SimulatorServer(self.username, self.password)
+        try:
+            transport.start_server(server=server)
+            channel = transport.accept(30)
+            if channel is None or not server.shell_requested.wait(10):
+                return
+            self._shell(channel, CLISession(self.switch, self.delay, self.jitter))
+        except Exception as e:
+            logger.debug(f"Session on port {self.port} ended: {str(e)}")
+        finally:
+            transport.close()
+
+    @staticmethod
+    def _send(channel, text: str):
+        channel.sendall(text.replace('\r\n', '\n').replace('\n', '\r\n').encode('utf-8'))
+
+    def _shell(self, channel, session: CLISession):
+        self._send(channel, f"\n{session.prompt}")
+        buffer = ''
+        pending: List[str] = []
+        last_char = ''
+        while not self._stop.is_set():
+            data = channel.recv(4096)
+            if not data:
+                return
+            for char in data.decode('utf-8', errors='ignore'):
+                if (char < ' ' and char not in '\r\n\x08') or '\x80' <= char < '\xa0':
+                    # Like IOS, ignore NULs (netmiko's is_alive probe) and other control characters
+                    continue
+                if pending:
+                    # Answering a --More-- pager: space pages, return steps a line, anything else quits
+                    self._send(channel, '\r' + ' ' * 10 + '\r')
+                    if char == ' ':
+                        pending = self._page(channel, session, pending)
+                    elif char in '\r\n':
+                        self._send(channel, pending.pop(0) + '\n')
+                        pending = self._page(channel, session, pending, more_only=True)
+                    else:
+                        pending = []
+                    if not pending:
+                        self._send(channel, session.prompt)
+                    continue
+                if char == '\n' and last_char == '\r':
+                    last_char = char
+                    continue
+                last_char = char
+                if char in '\r\n':
+                    self._send(channel, '\n')
+                    output = session.handle(buffer)
+                    buffer = ''
+                    lines = output.split('\n') if output else []
+                    pending = self._page(channel, session, lines)
+                    if not pending:
+                        self._send(channel, session.prompt)
+                elif char in '\x08\x7f':
+                    if buffer:
+                        buffer = buffer[:-1]
+                        self._send(channel, '\b \b')
+                else:
+                    buffer += char
+                    self._send(channel, char)
+
+    def _page(self, channel, session: CLISession, lines: List[str], more_only: bool = False) -> List[str]:
+        """Send a page of output and return the lines still waiting behind --More--"""
+        page = len(lines) if session.terminal_length == 0 else max(1, session.terminal_length - 1)
+        if more_only:
+            page = 0
+        for line in lines[:page]:
+            self._send(channel, line + '\n')
+        rest = lines[page:]
+        if rest:
+            self._send(channel, ' --More-- ')
+        return rest
+
+def start_simulators(count: int = 1, base_port: int = 0, host: str = '127.0.0.1', members: int = 1,
+                     ports: int = 48, delay: float = 0.0, jitter: float = 0.0, username: str = 'admin',
+                     password: str = 'admin', seed: Optional[int] = None,
+                     host_key: Optional[paramiko.PKey] = None) -> List[SimulatorInstance]:
+    """Start ``count`` simulated switches; ``base_port=0`` picks free ports"""
+    host_key = host_key or paramiko.RSAKey.generate(2048)
+    instances = []
+    for index in range(count):
+        switch = SimulatedSwitch(f"SIM-SW{index + 1:03d}", members=members, ports=ports,
+                                 seed=None if seed is None else seed + index)
+        port = base_port + index if base_port else 0
+        instances.append(SimulatorInstance(switch, host, port, host_key, username, password,
+                                           delay, jitter).start())
+    return instances
+
+def main():
+    parser = argparse.ArgumentParser(description='Run simulated IOS switches on localhost SSH ports')
+    parser.add_argument('--count', type=int, default=1, help='number of switches to simulate')
+    parser.add_argument('--base-port', type=int, default=2200, help='SSH port of the first switch')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--members', type=int, default=1, help='stack members per switch')
+    parser.add_argument('--ports', type=int, default=48, help='ports per stack member')
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds added to every command')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra delay per command, in seconds')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--seed', type=int, help='seed for the initial port security state')
+    parser.add_argument('--host-key', help='RSA private key file (generated when omitted)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    host_key = paramiko.RSAKey.from_private_key_file(args.host_key) if args.host_key else None
+    instances = start_simulators(args.count, args.base_port, args.host, args.members, args.ports,
+                                 args.delay, args.jitter, args.username, args.password, args.seed, host_key)
+    for instance in instances:
+        logger.info(f"{instance.switch.hostname} listening on {args.host}:{instance.port} "
+                    f"({len(instance.switch.interfaces)} ports)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for instance in instances:
+            instance.stop()
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,10 @@
 // Global state
 let isConnected = false;
+let currentDevice = null;
+let lastLogSeq = null;
+let lastEventId = 0;
+let eventSource = null;
+const MAX_LOG_ROWS = 500;
 let currentConfig = {
     mock_mode: true,
     switch_ip: '192.168.1.1'
@@ -35,16 +40,24 @@ const legacyConnectBtn = document.getElementById('legacy-connect-btn');
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
     loadConfig();
-    loadLogs();
+    loadLogs().then(startEventStream);
     
-    // Set up auto-refresh for logs
+    // Poll for logs only where the event stream is unavailable
     setInterval(() => {
-        if (autoRefreshLogsCheckbox.checked) {
+        if (autoRefreshLogsCheckbox.checked && !eventSource) {
             loadLogs();
         }
     }, 5000);
 });
 
+autoRefreshLogsCheckbox.addEventListener('change', function() {
+    if (this.checked) {
+        loadLogs().then(startEventStream);
+    } else {
+        stopEventStream();
+    }
+});
+
 // Event listeners
 mockModeToggle.addEventListener('change', function() {
     currentConfig.mock_mode = this.checked;
@@ -60,7 +73,7 @@ switchIpInput.addEventListener('change', function() {
 connectBtn.addEventListener('click', connect);
 disconnectBtn.addEventListener('click', disconnect);
 executeBtn.addEventListener('click', executeAction);
-refreshInterfacesBtn.addEventListener('click', refreshInterfaces);
+refreshInterfacesBtn.addEventListener('click', () => refreshInterfaces(true));
 refreshLogsBtn.addEventListener('click', loadLogs);
 clearLogsBtn.addEventListener('click', clearLogs);
 legacyConnectBtn.addEventListener('click', legacyConnect);
@@ -87,21 +100,14 @@ async function legacyConnect() {
     setLoading(legacyConnectBtn, true);
 
     try {
-        const response = await fetch('/api/legacy-connect', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                ip: ip,
-                username: username,
-                password: password
-            })
+        const data = await submitJob('/api/legacy-connect', {
+            ip: ip,
+            username: username,
+            password: password
         });
-
-        const data = await response.json();
         
         if (data.success) {
+            currentDevice = data.device;
             showResult(data.output, 'success');
             updateConnectionStatus(true);
         } else {
@@ -124,6 +130,7 @@ async function loadConfig() {
         mockModeToggle.checked = data.mock_mode;
         modeLabel.textContent = data.mock_mode ? 'Mock Mode' : 'Real Mode';
         switchIpInput.value = data.switch_ip;
+        currentDevice = data.connected ? data.device : null;
         
         updateConnectionStatus(data.connected);
     } catch (error) {
@@ -149,16 +156,12 @@ async function connect() {
     setLoading(connectBtn, true);
     
     try {
-        const response = await fetch('/api/connect', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
+        const data = await submitJob('/api/connect', {
+            device: currentConfig.switch_ip
         });
         
-        const data = await response.json();
-        
         if (data.success) {
+            currentDevice = data.device;
             updateConnectionStatus(true);
             showResult(data.message, 'success');
             await refreshInterfaces();
@@ -180,10 +183,14 @@ async function disconnect() {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-            }
+            },
+            body: JSON.stringify({
+                device: currentDevice
+            })
         });
         
         const data = await response.json();
+        currentDevice = null;
         updateConnectionStatus(false);
         showResult(data.message, 'success');
         
@@ -196,14 +203,19 @@ async function disconnect() {
     }
 }
 
-async function refreshInterfaces() {
+async function refreshInterfaces(force = false) {
     if (!isConnected) return;
     
     setLoading(refreshInterfacesBtn, true);
     
     try {
-        const response = await fetch('/api/interfaces');
-        const data = await response.json();
+        const response = await fetch('/api/interfaces?' + deviceQuery() + (force ? '&refresh=1' : ''));
+        let data = await response.json();
+        
+        if (response.status === 202) {
+            // Not cached: the switch is being read by a job
+            data = await waitForJob(data.job_id);
+        }
         
         if (data.interfaces) {
             interfaceSelect.innerHTML = '<option value="">Select Interface</option>';
@@ -233,6 +245,7 @@ async function executeAction() {
     setLoading(executeBtn, true);
     
     const requestData = {
+        device: currentDevice,
         interface: interface,
         action: action
     };
@@ -244,15 +257,7 @@ async function executeAction() {
     }
     
     try {
-        const response = await fetch('/api/port-security', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(requestData)
-        });
-        
-        const data = await response.json();
+        const data = await submitJob('/api/port-security', requestData);
         
         if (data.success) {
             showResult(data.result, 'success');
@@ -268,33 +273,108 @@ async function executeAction() {
 
 async function loadLogs() {
     try {
-        const response = await fetch('/api/logs');
+        // Only fetch entries newer than the ones already shown
+        const url = lastLogSeq === null ? '/api/logs' : '/api/logs?after=' + lastLogSeq;
+        const response = await fetch(url);
         const data = await response.json();
         
-        logsContainer.innerHTML = '';
-        
-        if (data.logs && data.logs.length > 0) {
-            data.logs.forEach(log => {
-                const logEntry = document.createElement('div');
-                logEntry.className = 'log-entry';
-                logEntry.innerHTML = `
-                    <span class="log-timestamp">${log.timestamp}</span>
-                    <span class="log-level ${log.level}">${log.level}</span>
-                    <span class="log-message">${log.message}</span>
-                `;
-                logsContainer.appendChild(logEntry);
-            });
-            
-            // Auto-scroll to bottom
-            logsContainer.scrollTop = logsContainer.scrollHeight;
-        } else {
-            logsContainer.innerHTML = '<div class="log-entry">No logs available</div>';
+        if (lastLogSeq === null || data.reset) {
+            logsContainer.innerHTML = '';
+            lastLogSeq = 0;
         }
+        appendLogs(data.logs || []);
+        lastLogSeq = Math.max(lastLogSeq, data.last_seq);
+        lastEventId = data.event_id;
     } catch (error) {
         console.error('Failed to load logs:', error);
     }
 }
 
+function appendLogs(logs) {
+    // Skip entries already shown (the stream and a manual refresh can overlap)
+    logs = logs.filter(log => log.seq > lastLogSeq);
+    
+    if (logs.length === 0) {
+        if (!logsContainer.firstChild) {
+            logsContainer.innerHTML = '<div class="log-entry log-empty">No logs available</div>';
+        }
+        return;
+    }
+    
+    const placeholder = logsContainer.querySelector('.log-empty');
+    if (placeholder) {
+        placeholder.remove();
+    }
+    
+    logs.forEach(log => {
+        const logEntry = document.createElement('div');
+        logEntry.className = 'log-entry';
+        logEntry.innerHTML = `
+            <span class="log-timestamp">${log.timestamp}</span>
+            <span class="log-level ${log.level}">${log.level}</span>
+            <span class="log-message">${log.message}</span>
+        `;
+        logsContainer.appendChild(logEntry);
+    });
+    lastLogSeq = logs[logs.length - 1].seq;
+    
+    // Drop the oldest rows so the list stays bounded
+    while (logsContainer.childElementCount > MAX_LOG_ROWS) {
+        logsContainer.firstElementChild.remove();
+    }
+    
+    // Auto-scroll to bottom
+    logsContainer.scrollTop = logsContainer.scrollHeight;
+}
+
+// Server-Sent Events: push new log entries instead of polling
+function startEventStream() {
+    if (!window.EventSource || eventSource || !autoRefreshLogsCheckbox.checked) return;
+    
+    eventSource = new EventSource('/api/events?last_event_id=' + lastEventId);
+    
+    eventSource.addEventListener('log', function(event) {
+        const log = JSON.parse(event.data);
+        if (lastLogSeq !== null && log.seq > lastLogSeq + 1) {
+            // Entries were logged by another worker process; fetch the gap
+            loadLogs();
+        } else {
+            appendLogs([log]);
+        }
+    });
+    
+    eventSource.addEventListener('clear', function() {
+        logsContainer.innerHTML = '';
+    });
+    
+    eventSource.onopen = function() {
+        // Catch up on entries logged while the stream was (re)connecting
+        if (lastLogSeq !== null) {
+            loadLogs();
+        }
+    };
+    
+    eventSource.addEventListener('reset', function() {
+        // Events were missed; reload the recent log tail
+        lastLogSeq = null;
+        loadLogs();
+    });
+    
+    eventSource.onerror = function() {
+        // The browser retries on its own unless the stream was closed for good
+        if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+            eventSource = null;
+        }
+    };
+}
+
+function stopEventStream() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
+
 async function clearLogs() {
     try {
         await fetch('/api/logs/clear', {
@@ -307,6 +387,45 @@ async function clearLogs() {
 }
 
 // Helper functions
+
+// Slow endpoints answer 202 with a job ID; wait for the job and return its result
+async function submitJob(url, body) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    });
+    
+    const data = await response.json();
+    if (response.status !== 202) {
+        return data;
+    }
+    return waitForJob(data.job_id);
+}
+
+async function waitForJob(jobId) {
+    let delay = 200;
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, delay));
+        
+        const response = await fetch('/api/jobs/' + jobId);
+        const job = await response.json();
+        
+        if (job.status === 'done') {
+            return job.result;
+        }
+        if (job.status === 'error' || !response.ok) {
+            throw new Error(job.error || 'Job failed');
+        }
+        delay = Math.min(delay * 2, 1000);
+    }
+}
+function deviceQuery() {
+    return currentDevice ? 'device=' + encodeURIComponent(currentDevice) : '';
+}
+
 function updateConnectionStatus(connected) {
     isConnected = connected;
     
@@ -337,8 +456,8 @@ function showResult(message, type) {
         resultContainer.classList.add('result-error');
     }
     
-    // Auto-refresh logs to show latest activity
-    if (autoRefreshLogsCheckbox.checked) {
+    // Auto-refresh logs to show latest activity when they are not streamed
+    if (autoRefreshLogsCheckbox.checked && !eventSource) {
         setTimeout(loadLogs, 1000);
     }
 }
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Keep the files app.py creates on import out of the working tree
+_scratch = tempfile.mkdtemp(prefix='switch-tests-')
+os.environ.setdefault('LOG_FILE', os.path.join(_scratch, 'cisco_app.log'))
+os.environ.setdefault('AUDIT_DB', os.path.join(_scratch, 'audit.db'))
+os.environ.setdefault('STATE_DB', os.path.join(_scratch, 'state.db'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,76 @@
+import pytest
+
+import app
+from app import CircuitBreaker, SessionsBusy
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the monotonic clock and take the full backoff instead of a jittered one"""
+    now = [1000.0]
+    monkeypatch.setattr(app.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(app.random, 'uniform', lambda low, high: high)
+    return now
+
+
+def test_opens_after_threshold_and_fails_fast(clock):
+    breaker = CircuitBreaker('sw', failure_threshold=3, base_delay=5, max_delay=300)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow() == (True, 0.0)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() == (False, 5.0)
+    clock[0] += 2
+    assert breaker.allow() == (False, 3.0)
+
+
+def test_one_probe_after_backoff_and_success_closes(clock):
+    breaker = CircuitBreaker('sw', failure_threshold=1, base_delay=5, max_delay=300)
+    breaker.record_failure()
+    clock[0] += 5
+
+    assert breaker.allow() == (True, 0.0)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()[0] is False
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.trips == 0
+    assert breaker.allow() == (True, 0.0)
+
+
+def test_failed_probe_reopens_with_doubled_backoff_up_to_max(clock):
+    breaker = CircuitBreaker('sw', failure_threshold=1, base_delay=5, max_delay=30)
+    delays = []
+    for _ in range(5):
+        breaker.record_failure()
+        delays.append(breaker.allow()[1])
+        clock[0] += delays[-1]
+        assert breaker.allow() == (True, 0.0)
+    assert delays == [5, 10, 20, 30, 30]
+
+
+def test_released_probe_can_be_retried(clock):
+    breaker = CircuitBreaker('sw', failure_threshold=1, base_delay=5, max_delay=300)
+    breaker.record_failure()
+    clock[0] += 5
+    assert breaker.allow()[0]
+
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() == (True, 0.0)
+
+
+def test_busy_sessions_do_not_count_as_failures(monkeypatch):
+    class BusySwitch:
+        def connect(self):
+            raise SessionsBusy('All 2 sessions to 192.0.2.9:22 are busy, try again later')
+
+    monkeypatch.setattr(app.switch_manager, 'create_switch', lambda *args, **kwargs: BusySwitch())
+    for _ in range(app.config.breaker_failure_threshold + 1):
+        switch, message = app.switch_manager.open_switch('192.0.2.9', 'admin', 'secret', mock=False)
+        assert switch is None
+        assert 'busy' in message
+    assert app.circuit_breakers.get('192.0.2.9').state == CircuitBreaker.CLOSED
@@ -0,0 +1,61 @@
+import pytest
+
+from app import build_port_security_batch, compress_interface_ranges, validate_port_security_args
+
+
+def test_consecutive_ports_collapse_into_one_range():
+    names = [f"GigabitEthernet1/0/{port}" for port in range(1, 25)] + ['Gi1/0/30']
+    assert compress_interface_ranges(names) == ['Gi1/0/1 - 24 , Gi1/0/30']
+
+
+def test_ranges_are_grouped_per_module_and_deduplicated():
+    assert compress_interface_ranges(['Gi1/0/3', 'Gi2/0/1', 'Gi1/0/2', 'Gi1/0/3', 'Gi2/0/2']) == [
+        'Gi1/0/2 - 3 , Gi2/0/1 - 2']
+
+
+def test_range_arguments_hold_at_most_max_ranges():
+    names = [f"Gi0/{port}" for port in range(1, 24, 2)]
+    result = compress_interface_ranges(names, max_ranges=5)
+    assert [len(argument.split(' , ')) for argument in result] == [5, 5, 2]
+
+
+def test_subinterfaces_are_kept_unspanned():
+    assert compress_interface_ranges(['Gi0/1', 'Gi0/2.10']) == ['Gi0/1 , GigabitEthernet0/2.10']
+
+
+def test_batch_groups_identical_settings():
+    commands = build_port_security_batch([
+        {'interface': 'Gi0/1', 'action': 'enable', 'max_mac': 2, 'violation_action': 'restrict'},
+        {'interface': 'Gi0/2', 'action': 'enable', 'max_mac': '2', 'violation_action': 'RESTRICT'},
+        {'interface': 'Gi0/5', 'action': 'disable'},
+    ])
+    assert commands == [
+        'interface range Gi0/1 - 2',
+        'switchport port-security',
+        'switchport port-security maximum 2',
+        'switchport port-security violation restrict',
+        'exit',
+        'interface range Gi0/5',
+        'no switchport port-security',
+        'exit',
+    ]
+
+
+@pytest.mark.parametrize('change', [
+    {'interface': 'Gi0/1', 'action': 'enable', 'violation_action': 'restrict\nusername x privilege 15'},
+    {'interface': 'Gi0/1\nusername x privilege 15', 'action': 'disable'},
+    {'interface': 'Gi0/1 , Gi0/2', 'action': 'disable'},
+    {'interface': 'Gi0/1', 'action': 'enable', 'max_mac': '1\nend'},
+    {'interface': 'Gi0/1', 'action': 'enable', 'max_mac': 0},
+    {'interface': 'Gi0/1', 'action': 'enable', 'max_mac': True},
+    {'interface': 'Gi0/1', 'action': 'clear'},
+])
+def test_batch_rejects_unsafe_changes(change):
+    with pytest.raises(ValueError):
+        build_port_security_batch([change])
+
+
+def test_validate_returns_normalized_enable_settings():
+    assert validate_port_security_args('Gi0/1', 'enable', '3', 'Protect') == {
+        'max_mac': 3, 'violation_action': 'protect'}
+    assert validate_port_security_args('GigabitEthernet0/1', 'status') == {}
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+import app
+from app import ConnectionPool, DeviceRateLimiter, RateLimiterRegistry, RateLimitProfile, SessionsBusy, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the monotonic clock and record sleeps instead of sleeping"""
+    now = [1000.0]
+    sleeps = []
+    monkeypatch.setattr(app.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(app.time, 'sleep', sleeps.append)
+    return now, sleeps
+
+
+def test_bucket_serves_bursts_then_queues_in_arrival_order(clock):
+    now, sleeps = clock
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits == pytest.approx([0, 0, 0.1, 0.2, 0.3])
+    assert sleeps == pytest.approx([0.1, 0.2, 0.3])
+
+    # Once the debt is repaid the bucket refills up to its burst only
+    now[0] += 10
+    assert [bucket.acquire() for _ in range(3)] == pytest.approx([0, 0, 0.1])
+
+
+def test_bucket_configure_keeps_the_debt(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+    for _ in range(3):
+        bucket.acquire()
+    bucket.configure(rate=5, burst=1)
+    assert bucket.acquire() == pytest.approx(0.6)
+
+
+def test_zero_rate_never_waits(clock):
+    bucket = TokenBucket(rate=0, burst=1)
+    assert [bucket.acquire() for _ in range(100)] == [0.0] * 100
+
+
+def test_profiles_match_models_first_match_wins():
+    registry = RateLimiterRegistry(RateLimitProfile.parse_all('WS-C2960*=5,10,2;WS-*=8,8,3;*=10,20,4'))
+    assert registry.profile_for('ws-c2960x-48fps-l').pattern == 'WS-C2960*'
+    assert registry.profile_for('WS-C3850-24T').pattern == 'WS-*'
+    assert registry.profile_for(None).pattern == '*'
+    with pytest.raises(ValueError):
+        RateLimitProfile.parse_all('WS-C2960*=5,10')
+
+
+def test_learning_the_model_updates_the_shared_limiter_in_place():
+    registry = RateLimiterRegistry(RateLimitProfile.parse_all('WS-C2960*=5,10,2;*=10,20,4'))
+    limiter = registry.get('10.0.0.1:22')
+    assert limiter.profile.pattern == '*'
+    assert not registry.knows_model('10.0.0.1:22')
+
+    assert registry.set_model('10.0.0.1:22', 'WS-C2960-24TT-L') is limiter
+    assert registry.get('10.0.0.1:22') is limiter
+    assert limiter.profile.pattern == 'WS-C2960*'
+    assert limiter.bucket.rate == 5
+    assert registry.model('10.0.0.1:22') == 'WS-C2960-24TT-L'
+
+
+def test_session_slots_wait_time_out_and_free_up():
+    limiter = DeviceRateLimiter('sw', RateLimitProfile('*', 0, 1, 1))
+    assert limiter.open_session(timeout=0)
+    assert not limiter.open_session(timeout=0.05)
+
+    threading.Timer(0.05, limiter.close_session).start()
+    assert limiter.open_session(timeout=5)
+    assert limiter.open_sessions == 1
+
+
+def test_raising_the_session_limit_wakes_waiters():
+    limiter = DeviceRateLimiter('sw', RateLimitProfile('*', 0, 1, 1))
+    limiter.open_session(timeout=0)
+    opened = []
+    waiter = threading.Thread(target=lambda: opened.append(limiter.open_session(timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    limiter.update(RateLimitProfile('*', 0, 1, 2))
+    waiter.join()
+    assert opened == [True]
+    assert limiter.open_sessions == 2
+
+
+class FakeConnection:
+    def __init__(self, **device):
+        self.device = device
+        self.closed = False
+
+    def is_alive(self):
+        return not self.closed
+
+    def disconnect(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr('netmiko.ConnectHandler', FakeConnection)
+    monkeypatch.setattr(app.config, 'connection_timeout', 0.05)
+    pool = ConnectionPool(max_size=10, idle_ttl=60, keepalive=0)
+    yield pool
+    pool.close_all()
+
+
+def test_pool_caps_open_sessions_per_switch(pool):
+    app.rate_limiters.set_model('192.0.2.1:22', 'WS-C2960-24TT-L')
+    limiter = app.rate_limiters.get('192.0.2.1:22')
+    first = pool.acquire('192.0.2.1', 'admin', 'secret')
+    pool.acquire('192.0.2.1', 'admin', 'secret')
+    assert limiter.open_sessions == 2
+
+    with pytest.raises(SessionsBusy):
+        pool.acquire('192.0.2.1', 'admin', 'secret')
+    assert limiter.open_sessions == 2
+
+    # Pooled idle sessions keep their slot until closed
+    pool.release('192.0.2.1', 'admin', 'secret', 22, first)
+    assert limiter.open_sessions == 2
+    assert pool.acquire('192.0.2.1', 'admin', 'secret') is first
+
+
+def test_pool_evicts_an_idle_session_to_make_room(pool):
+    app.rate_limiters.set_model('192.0.2.2:22', 'WS-C2960-24TT-L')
+    limiter = app.rate_limiters.get('192.0.2.2:22')
+    idle = pool.acquire('192.0.2.2', 'admin', 'secret')
+    pool.acquire('192.0.2.2', 'admin', 'secret')
+    pool.release('192.0.2.2', 'admin', 'secret', 22, idle)
+
+    other = pool.acquire('192.0.2.2', 'operator', 'other')
+    assert idle.closed
+    assert other is not idle
+    assert limiter.open_sessions == 2
+
+    pool.close_all()
+    pool.release('192.0.2.2', 'operator', 'other', 22, other)
+    pool.close_all()
+    assert limiter.open_sessions == 1
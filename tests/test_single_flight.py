@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from app import SingleFlight
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def run_concurrently(flights, key, fn, callers):
+    """Start ``callers`` threads calling ``flights.do`` and return their (result or exception, shared) pairs"""
+    results = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            outcome = flights.do(key, fn)
+        except Exception as e:
+            outcome = (e, None)
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'output'
+
+    threads, results = run_concurrently(flights, 'show version', fetch, 5)
+    wait_until(lambda: flights.executed + flights.coalesced == 5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(result == 'output' for result, _ in results)
+
+
+def test_waiters_get_the_callers_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ConnectionError('session lost')
+
+    threads, results = run_concurrently(flights, 'key', fail, 3)
+    wait_until(lambda: flights.executed + flights.coalesced == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert flights.executed == 1
+    assert all(isinstance(error, ConnectionError) for error, _ in results)
+
+
+def test_finished_calls_are_not_shared():
+    flights = SingleFlight()
+    assert flights.do('key', lambda: 1) == (1, False)
+    assert flights.do('key', lambda: 2) == (2, False)
+
+
+def test_forget_makes_later_callers_start_afresh():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'before'
+
+    first = threading.Thread(target=flights.do, args=(('sw1', 'show run'), slow))
+    first.start()
+    started.wait(5)
+    flights.forget(lambda key: key[0] == 'sw1')
+
+    assert flights.do(('sw1', 'show run'), lambda: 'after') == ('after', False)
+    release.set()
+    first.join()
+
+
+def test_exception_is_raised_to_the_caller_that_ran_it():
+    flights = SingleFlight()
+    with pytest.raises(ValueError):
+        flights.do('key', lambda: int('x'))
@@ -0,0 +1,18 @@
+"""WSGI entry point for serving the app with several worker processes
+
+Workers share state through the SQLite state store, so select it and run
+any WSGI server, e.g.:
+
+    STATE_BACKEND=sqlite gunicorn --workers 4 --threads 8 --bind 0.0.0.0:5000 wsgi:app
+
+Every open ``/api/events`` stream occupies one worker thread until it is
+closed after ``EVENT_STREAM_MAX_AGE`` seconds, so size ``--threads`` for the
+expected number of open browser tabs plus API requests.
+
+Do not use ``--preload``: each worker must import the app itself so its
+background threads (log writer, audit writer, pool reaper) are started in
+the worker rather than in the master process.
+"""
+from app import app
+
+__all__ = ['app']